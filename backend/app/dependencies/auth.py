@@ -1,30 +1,53 @@
+import hashlib
 from fastapi import Depends, HTTPException, Header
 from typing import Optional
-from app.services.supabase_client import supabase
+from app.services.supabase_client import supabase, execute_read_async
+from app.services.resilience import BackendUnavailable
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from app.routers.admin_auth import ADMIN_SESSIONS
+from supabase_auth.types import User
+from app.services.shared_state import shared_cache
+from app.routers.admin_auth import get_admin_session
 
 security = HTTPBearer()
 
+# Verified tokens are cached briefly in the shared store so a user hopping
+# between workers is checked against Supabase Auth once, not once per worker
+TOKEN_CACHE_TTL_SECONDS = 60
+
+
+async def _verify_token(token: str):
+    key = "auth_user:" + hashlib.sha256(token.encode()).hexdigest()
+    cached = shared_cache.get(key)
+    if cached is not None:
+        return User.model_validate(cached)
+
+    res = await execute_read_async(lambda: supabase.auth.get_user(token))
+    user = res.user if res else None
+    if user is not None:
+        shared_cache.set(key, user.model_dump(mode="json"), TOKEN_CACHE_TTL_SECONDS)
+    return user
+
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security)
 ):
     token = credentials.credentials
 
     try:
-        res = supabase.auth.get_user(token)
+        user = await _verify_token(token)
+    except BackendUnavailable:
+        raise
     except Exception as e:
         print(f"Supabase error {str(e)}" )
         raise HTTPException(status_code=401, detail="Token verification failed")
 
-    if not res or not res.user:
+    if not user:
         raise HTTPException(status_code=401, detail="Invalid user")
 
-    return res.user
+    return user
 
 async def get_current_admin(credentials: HTTPAuthorizationCredentials = Depends(security)):
     token = credentials.credentials
-    email = ADMIN_SESSIONS.get(token)
+    email = get_admin_session(token)
     
     if not email:
         raise HTTPException(
@@ -44,8 +67,7 @@ async def get_optional_user(authorization: Optional[str] = Header(None)):
     token = authorization.replace("Bearer ", "")
 
     try:
-        res = supabase.auth.get_user(token)
-        user = res.user
+        user = await _verify_token(token)
     except Exception as e:
         print(f"Supabase token error: {e}")
         return None  # treat as anonymous
@@ -1,11 +1,37 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from app.routers import auth
 from app.routers import report
 from app.routers import users
 from app.routers import admin_auth
+from app.services.notifications import start_notification_worker, stop_notification_worker
+from app.services.event_bus import start_event_relay, stop_event_relay
+from app.services.leaderboard import leaderboard_refresh
+from app.services.analytics import analytics_refresh
+from app.services.trending import trending_refresh
+from app.services.resilience import BackendUnavailable
+from app.services.rate_limit import WriteLoadShedMiddleware
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+	start_notification_worker()
+	start_event_relay()
+	leaderboard_refresh.start()
+	analytics_refresh.start()
+	trending_refresh.start()
+	yield
+	await trending_refresh.stop()
+	await analytics_refresh.stop()
+	await leaderboard_refresh.stop()
+	await stop_event_relay()
+	await stop_notification_worker()
+
+app = FastAPI(lifespan=lifespan)
+
+# Added before CORS so shed responses still carry CORS headers
+app.add_middleware(WriteLoadShedMiddleware)
 
 # Add CORS middleware
 app.add_middleware(
@@ -16,6 +42,14 @@ app.add_middleware(
 	allow_headers=["*"],
 )
 
+@app.exception_handler(BackendUnavailable)
+async def backend_unavailable_handler(request: Request, exc: BackendUnavailable):
+	return JSONResponse(
+		status_code=503,
+		content={"detail": str(exc)},
+		headers={"Retry-After": str(exc.retry_after)},
+	)
+
 app.include_router(auth.router)
 app.include_router(report.router)
 app.include_router(users.router)
@@ -1,21 +1,26 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from app.services.supabase_client import supabase
+from app.services.supabase_client import supabase, execute_read_async, execute_write_async
+from app.services.resilience import BackendUnavailable
 from app.schemas.admin_schema import AdminLoginRequest, Token
 from app.utils.security import verify_password, get_password_hash
+from app.services.rate_limit import rate_limit_ip
+from app.services.shared_state import shared_state
 from uuid import uuid4
 
 router = APIRouter(prefix="/admin/auth", tags=["Admin Auth"])
 
-# Simple in-memory session store
-# { "token_uuid": "admin_email" }
-ADMIN_SESSIONS = {}
+# Sessions live in the shared store so every worker accepts the same token
+# admin_session:<token> -> admin_email
+ADMIN_SESSION_TTL_SECONDS = 12 * 3600
 
-@router.post("/login")
+@router.post("/login", dependencies=[Depends(rate_limit_ip("admin_login"))])
 async def login(form_data: AdminLoginRequest):
     # 1. Fetch admin by email
     try:
-        response = supabase.table("admins").select("*").eq("email", form_data.email).single().execute()
+        response = await execute_read_async(supabase.table("admins").select("*").eq("email", form_data.email).single())
         admin = response.data
+    except BackendUnavailable:
+        raise
     except Exception as e:
         print(f"Error fetching admin: {e}")
         raise HTTPException(status_code=400, detail="Invalid credentials")
@@ -28,23 +33,23 @@ async def login(form_data: AdminLoginRequest):
 
     # 2. Generate Simple Token
     token = str(uuid4())
-    ADMIN_SESSIONS[token] = admin["email"]
+    shared_state.set(f"admin_session:{token}", admin["email"], ADMIN_SESSION_TTL_SECONDS)
     
     return {"access_token": token, "token_type": "bearer"}
 
 def get_admin_session(token: str):
-    return ADMIN_SESSIONS.get(token)
+    return shared_state.get(f"admin_session:{token}")
 
 @router.post("/setup-seed", include_in_schema=False)
 async def seed_admin(form_data: AdminLoginRequest):
-    res = supabase.table("admins").select("*").eq("email", form_data.email).execute()
+    res = await execute_read_async(supabase.table("admins").select("*").eq("email", form_data.email))
     if res.data:
         return {"message": "Admin already exists"}
     
     hashed_pw = get_password_hash(form_data.password)
-    supabase.table("admins").insert({
+    await execute_write_async(supabase.table("admins").insert({
         "email": form_data.email,
         "password_hash": hashed_pw
-    }).execute()
+    }))
     
     return {"message": "Admin created"}
@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Depends, Header, HTTPException
-from app.services.supabase_client import supabase
+from app.services.supabase_client import supabase, execute_read_async, execute_write_async
 from app.dependencies.auth import get_current_user
 
 router = APIRouter(
@@ -16,7 +16,7 @@ async def sync_user(user = Depends(get_current_user)):
     avatar = metadata.get("avatar_url") or ""
     
     # Check if user exists in users table 
-    isUserExists = (supabase.table("users").select("user_id").eq("user_id", user_id).execute())
+    isUserExists = await execute_read_async(supabase.table("users").select("user_id").eq("user_id", user_id))
     
     if len(isUserExists.data) == 0:
         # Create new user 
@@ -26,7 +26,7 @@ async def sync_user(user = Depends(get_current_user)):
             "avatar": avatar, 
             "points": 0,
         }
-        supabase.table("users").insert(new_user).execute()
+        await execute_write_async(supabase.table("users").insert(new_user))
 
     return {"message": "User synchronized successfully"}
 
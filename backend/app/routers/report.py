@@ -1,14 +1,56 @@
-from fastapi import APIRouter, Form, File, UploadFile, Depends, HTTPException
+from fastapi import APIRouter, Form, File, UploadFile, Depends, HTTPException, Request, Header, Query
+from fastapi.responses import StreamingResponse
 from uuid import uuid4
-from app.services.supabase_client import supabase
+from datetime import datetime, timezone
+from typing import Literal
+import asyncio
+import json
+from app.services.supabase_client import supabase, execute_read_async, execute_write_async, STORAGE_TIMEOUT
+from app.services.resilience import BackendUnavailable
+from app.services.rate_limit import rate_limit_user, check_rate_limit
+from app.services.idempotency import run_idempotent
+from app.services.report_export import iter_report_pages, stream_csv, stream_parquet
+from app.services.analytics import report_analytics
+from app.services.trending import trending_reports
 from app.dependencies.auth import get_current_user, get_optional_user, get_current_admin
-from app.schemas.report_schema import Report, ReportListResponse, ReportDetailResponse, ReportFollowRequest, ReportCommentRequest, ReportInProgressRequest, ReportCloseRequest, ReportConfirmRequest, ReportFlagRequest, ReportModerationRequest
-from app.utils.action import record_user_action
+from app.schemas.report_schema import Report, ReportListResponse, ReportDetailResponse, ReportFollowRequest, ReportCommentRequest, ReportInProgressRequest, ReportCloseRequest, ReportConfirmRequest, ReportFlagRequest, ReportModerationRequest, ReportBulkFollowRequest, ReportBulkModerationRequest, BulkResponse, TrendingReportListResponse
+from app.utils.action import record_user_action, record_user_actions
+from app.services.event_bus import report_events, publish_report_event, StreamLimitReached
+from app.services.notifications import enqueue_report_notification
+from app.services.report_cache import get_report_list, get_follow_set, invalidate_report_list, invalidate_follow_set
 
 router = APIRouter(
     prefix="/report",
 )
 
+SSE_HEARTBEAT_SECONDS = 15
+# Followers embedded in the report detail; the rest come from /{report_id}/followers
+FOLLOWER_PREVIEW_SIZE = 10
+
+
+async def _fetch_followers_page(report_id: int, limit: int, before: int | None = None):
+    query = (
+        supabase.table("report_followers")
+        .select(
+            """
+            id,
+            users:user_id (
+                name,
+                avatar
+            )
+            """
+        )
+        .eq("report_id", report_id)
+    )
+    if before is not None:
+        query = query.lt("id", before)
+    res = await execute_read_async(
+        query.order("id", desc=True).limit(limit),
+        cache_key=f"report_followers:{report_id}:{limit}" if before is None else None,
+        hedge=before is None,
+    )
+    return res.data or []
+
 
 # Create new report
 @router.post("/create")
@@ -21,185 +63,207 @@ async def create_report(
     longitude: float | None = Form(None),
     is_anonymous: bool = Form(False),
     photo: UploadFile | None = File(None),
+    idempotency_key: str | None = Header(None, alias="Idempotency-Key"),
     user=Depends(get_current_user),
 ) -> Report:
-    photo_url = None
-
-    # Upload photo if provided
-    if photo:
-        file_ext = photo.filename.split(".")[-1]
-        filename = f"{uuid4()}.{file_ext}"
-        path = f"reports/{filename}"
-
-        try:
-            content = await photo.read()
-            # Upload photo to supabase bucket
-            supabase.storage.from_("report-photos").upload(
-                path, content, {"content-type": photo.content_type}
+    async def handle():
+        # Limited inside the handler so a replayed Idempotency-Key gets its
+        # stored report back without spending a token
+        check_rate_limit("report_create", user.id)
+        photo_url = None
+
+        # Upload photo if provided
+        if photo:
+            file_ext = photo.filename.split(".")[-1]
+            filename = f"{uuid4()}.{file_ext}"
+            path = f"reports/{filename}"
+
+            try:
+                content = await photo.read()
+                # Upload photo to supabase bucket
+                await execute_write_async(
+                    lambda: supabase.storage.from_("report-photos").upload(
+                        path, content, {"content-type": photo.content_type}
+                    ),
+                    deadline=STORAGE_TIMEOUT,
+                )
+                # Obtain image URL (built locally, no request)
+                photo_url = supabase.storage.from_("report-photos").get_public_url(path)
+
+            except BackendUnavailable:
+                raise
+            except Exception as e:
+                print(f"Photo upload error: {str(e)}")
+                raise HTTPException(status_code=500, detail="Photo upload failed")
+
+        # Create report
+        result = await execute_write_async(
+            supabase.table("reports")
+            .insert(
+                {
+                    "title": title,
+                    "category": category,
+                    "description": description,
+                    "status": "open",
+                    "created_by": user.id,
+                    "closed_by": None,
+                    "location": location,
+                    "latitude": latitude,
+                    "longitude": longitude,
+                    "photo_url": photo_url,
+                    "is_anonymous": is_anonymous,
+                }
             )
-            # Obtain image URL
-            photo_url = supabase.storage.from_("report-photos").get_public_url(path)
-
-        except Exception as e:
-            print(f"Photo upload error: {str(e)}")
-            raise HTTPException(status_code=500, detail="Photo upload failed")
-
-    # Create report
-    result = (
-        supabase.table("reports")
-        .insert(
-            {
-                "title": title,
-                "category": category,
-                "description": description,
-                "status": "open",
-                "created_by": user.id,
-                "closed_by": None,
-                "location": location,
-                "latitude": latitude,
-                "longitude": longitude,
-                "photo_url": photo_url,
-                "is_anonymous": is_anonymous,
-            }
         )
-        .execute()
-    )
-
-    if result.data:
-        print("Report creation result: ", result.data)
-    else:
-        raise HTTPException(status_code=500, detail="Report creation failed")
 
-    # print("Created report: ", result.data)
-    # print(result.data[0])
-    report = result.data[0]
+        if result.data:
+            print("Report creation result: ", result.data)
+        else:
+            raise HTTPException(status_code=500, detail="Report creation failed")
+
+        # print("Created report: ", result.data)
+        # print(result.data[0])
+        report = result.data[0]
+
+        # Auto-follow own report
+        await execute_write_async(supabase.table("report_followers").insert(
+            {"report_id": report["report_id"], "user_id": user.id}
+        ))
+        invalidate_follow_set(user.id)
+        invalidate_report_list()
+        report_analytics.report_created(category, report.get("created_at"))
+        # The rebuild counts this follow from report_followers, so count it live too
+        trending_reports.record(report["report_id"], "follow")
 
-    # Auto-follow own report
-    supabase.table("report_followers").insert(
-        {"report_id": report["report_id"], "user_id": user.id}
-    ).execute()
+        # Record action
+        await asyncio.to_thread(record_user_action, user.id, "CREATE_REPORT", report["report_id"])
+        await asyncio.to_thread(record_user_action, user.id, "FOLLOW_REPORT", report["report_id"])
 
-    # Record action
-    record_user_action(user.id, "CREATE_REPORT", report["report_id"])
-    record_user_action(user.id, "FOLLOW_REPORT", report["report_id"])
+        return report
 
-    return report
+    payload = {
+        "title": title,
+        "category": category,
+        "description": description,
+        "location": location,
+        "latitude": latitude,
+        "longitude": longitude,
+        "is_anonymous": is_anonymous,
+        "photo": [photo.filename, photo.size] if photo else None,
+    }
+    return await run_idempotent(user.id, "create_report", idempotency_key, handle, payload)
 
 
 # Get all reports
 @router.get("/list", response_model=ReportListResponse)
 async def list_reports(user=Depends(get_optional_user)):
-    user_id = user.id if user else None
-
-    # Logged-in user
-    if user_id:
-        result = (
-            supabase.table("reports")
-            .select(
-                """
-                report_id,
-                title,
-                description,
-                status,
-                created_by,
-                closed_by,
-                location,
-                latitude,
-                longitude,
-                photo_url,
-                created_at,
-                updated_at,
-                category,
-                user_follow:report_followers!left(user_id),
-                followers:report_followers(count)
-                """
-            )
-            .eq("user_follow.user_id", user_id)
-            .eq("moderation_status", "active")
-            .order("created_at", desc=True)
-            .execute()
-        )
-
-    # Not logged in (no is_following info)
-    else:
-        result = (
-            supabase.table("reports")
-            .select(
-                """
-                report_id,
-                title,
-                description,
-                status,
-                created_by,
-                closed_by,
-                location,
-                latitude,
-                longitude,
-                photo_url,
-                created_at,
-                updated_at,
-                category,
-                moderation_status,
-                followers:report_followers(count)
-                """
-            )
-            .eq("moderation_status", "active")
-            .order("created_at", desc=True)
-            .execute()
-        )
-
-    clean_reports = []
+    # Shared anonymous list; logged-in users get is_following overlaid in memory
+    reports = await get_report_list()
 
-    for r in result.data:
-        clean_reports.append(
-            {
-                "report_id": r["report_id"],
-                "title": r["title"],
-                "category": r["category"],
-                "description": r["description"],
-                "status": r["status"],
-                "created_by": r["created_by"],
-                "closed_by": r["closed_by"],
-                "location": r["location"],
-                "latitude": r.get("latitude"),
-                "longitude": r.get("longitude"),
-                "photo_url": r["photo_url"],
-                "created_at": r["created_at"],
-                "updated_at": r["updated_at"],
-                "is_following": (
-                    len(r.get("user_follow", [])) > 0 if user_id else False
-                ),
-                "followers_count": (
-                    r["followers"][0]["count"] if r.get("followers") else 0
-                ),
-            }
-        )
+    if not user:
+        return {"reports": reports}
 
-    return {"reports": clean_reports}
+    followed = await get_follow_set(user.id)
+    return {
+        "reports": [
+            {**r, "is_following": r["report_id"] in followed} for r in reports
+        ]
+    }
+
+
+# Trending reports (served from the in-memory hotness ranking)
+@router.get("/trending", response_model=TrendingReportListResponse)
+async def get_trending_reports(limit: int = Query(20, ge=1, le=100), user=Depends(get_optional_user)):
+    # Over-fetch: some hot reports may have been moderated out of the active list
+    ranked = trending_reports.top(limit * 2)
+    active = {r["report_id"]: r for r in await get_report_list()}
+    followed = await get_follow_set(user.id) if user else None
+
+    reports = []
+    for report_id, hotness in ranked:
+        report = active.get(report_id)
+        if report is None:
+            continue
+        reports.append({
+            **report,
+            "is_following": report_id in followed if followed is not None else False,
+            "hotness": round(hotness, 3),
+        })
+        if len(reports) == limit:
+            break
+
+    return {"reports": reports}
 
 
 # Heatmap data (lightweight)
 @router.get("/heatmap")
 async def get_heatmap_data():
     """Return lightweight report data for the heatmap (only reports with coordinates)."""
-    result = (
+    result = await execute_read_async(
         supabase.table("reports")
         .select("report_id, title, category, status, latitude, longitude")
         .not_.is_("latitude", "null")
         .not_.is_("longitude", "null")
-        .eq("moderation_status", "active")
-        .execute()
+        .eq("moderation_status", "active"),
+        cache_key="heatmap",
     )
 
     return {"reports": result.data if result.data else []}
 
 
+# Live report updates (Server-Sent Events)
+@router.get("/{report_id}/events")
+async def report_events_stream(report_id: int, request: Request):
+    """Stream comment, status, verification and moderation events for a report.
+
+    Events are pushed by the write endpoints through the in-process bus, so an
+    idle report page costs no database queries.
+    """
+    if report_events.open_streams >= report_events.max_streams:
+        raise HTTPException(
+            status_code=503,
+            detail="Too many live connections, please retry later",
+            headers={"Retry-After": str(SSE_HEARTBEAT_SECONDS)},
+        )
+
+    async def event_stream():
+        # Subscribe inside the body so the slot is only taken once the
+        # generator runs, and its finally always gives it back
+        try:
+            queue = report_events.subscribe(report_id)
+        except StreamLimitReached:
+            # Lost a race for the last slot; the client reconnects after retry
+            yield f"retry: {SSE_HEARTBEAT_SECONDS * 1000}\n\n"
+            return
+
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                if await request.is_disconnected():
+                    break
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout=SSE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    # Keep proxies from closing the idle connection
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: {message['event']}\ndata: {json.dumps(message['data'], default=str)}\n\n"
+        finally:
+            report_events.unsubscribe(report_id, queue)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 # Get report by ID (include creator info, comments, followers)
 @router.get("/{report_id}", response_model=ReportDetailResponse)
 async def get_report(report_id: int, user=Depends(get_optional_user)):
     user_id = user.id if user else None
 
-    report_res = (
+    report_res = await execute_read_async(
         supabase.table("reports")
         .select(
             """
@@ -211,8 +275,9 @@ async def get_report(report_id: int, user=Depends(get_optional_user)):
             """
         )
         .eq("report_id", report_id)
-        .single()
-        .execute()
+        .single(),
+        cache_key=f"report:{report_id}",
+        hedge=True,
     )
 
     if not report_res.data:
@@ -224,34 +289,19 @@ async def get_report(report_id: int, user=Depends(get_optional_user)):
     if report.get("is_anonymous"):
         report["users"] = {"name": "Anonymous", "avatar": None}
 
-    # Fetch followers (for follower list UI)
-    followers_res = (
-        supabase.table("report_followers")
-        .select(
-            """
-            users:user_id (
-                name,
-                avatar
-            )
-            """
-        )
-        .eq("report_id", report_id)
-        .execute()
-    )
-
-    followers = followers_res.data if followers_res.data else []
+    # Most recent followers only; report["followers_count"] carries the total
+    followers = await _fetch_followers_page(report_id, FOLLOWER_PREVIEW_SIZE)
 
     # Check is_following (only if logged in)
     is_following = False
 
     if user_id:
-        follow_res = (
+        follow_res = await execute_read_async(
             supabase.table("report_followers")
             .select("user_id")
             .eq("report_id", report_id)
             .eq("user_id", user_id)
             .limit(1)
-            .execute()
         )
 
         is_following = len(follow_res.data) > 0
@@ -261,42 +311,142 @@ async def get_report(report_id: int, user=Depends(get_optional_user)):
 
 # Follow report
 @router.post("/follow")
-async def follow_report(req: ReportFollowRequest, user=Depends(get_current_user)):
-    try:
-        supabase.table("report_followers").insert(
-            {"report_id": req.report_id, "user_id": user.id}
-        ).execute()
-        
-        # Record action
-        record_user_action(user.id, "FOLLOW_REPORT", req.report_id)
-    except Exception as e:
-        print(f"Follow error: {str(e)}")
-    return {"message": "Report followed successfully"}
+async def follow_report(req: ReportFollowRequest, user=Depends(get_current_user), idempotency_key: str | None = Header(None, alias="Idempotency-Key")):
+    async def handle():
+        try:
+            await execute_write_async(supabase.table("report_followers").insert(
+                {"report_id": req.report_id, "user_id": user.id}
+            ))
+            invalidate_follow_set(user.id)
+            trending_reports.record(req.report_id, "follow")
+
+            # Record action
+            await asyncio.to_thread(record_user_action, user.id, "FOLLOW_REPORT", req.report_id)
+        except BackendUnavailable:
+            raise
+        except Exception as e:
+            print(f"Follow error: {str(e)}")
+            raise HTTPException(status_code=500, detail="Error following report")
+        return {"message": "Report followed successfully"}
+
+    return await run_idempotent(user.id, "follow_report", idempotency_key, handle, req)
 
 
 # Unfollow report
 @router.post("/unfollow")
 async def unfollow_report(req: ReportFollowRequest, user=Depends(get_current_user)):
-    supabase.table("report_followers").delete().eq("report_id", req.report_id).eq(
+    removed = await execute_write_async(supabase.table("report_followers").delete().eq("report_id", req.report_id).eq(
         "user_id", user.id
-    ).execute()
+    ))
+    if removed.data:
+        invalidate_follow_set(user.id)
     
-    supabase.table("user_actions").delete().eq("report_id", req.report_id).eq(
+    await execute_write_async(supabase.table("user_actions").delete().eq("report_id", req.report_id).eq(
         "user_id", user.id
-    ).eq("action_name", "FOLLOW_REPORT").execute()
+    ).eq("action_name", "FOLLOW_REPORT"))
 
-    supabase.table("report_helpers").delete().eq("report_id", req.report_id).eq(
+    await execute_write_async(supabase.table("report_helpers").delete().eq("report_id", req.report_id).eq(
         "user_id", user.id
-    ).execute()
+    ))
     return {"message": "Report unfollowed successfully"}
 
-# Fetch comments
+
+def _bulk_results(report_ids: list, succeeded: set, ok: str, missing: set, failed: str) -> dict:
+    results = []
+    for report_id in dict.fromkeys(report_ids):
+        if report_id in succeeded:
+            results.append({"report_id": report_id, "result": ok})
+        elif report_id in missing:
+            results.append({"report_id": report_id, "result": "not_found"})
+        else:
+            results.append({"report_id": report_id, "result": failed})
+    return {"results": results, "succeeded": len(succeeded)}
+
+
+# Follow several reports at once
+@router.post("/follow/bulk", response_model=BulkResponse)
+async def bulk_follow_reports(req: ReportBulkFollowRequest, user=Depends(get_current_user)):
+    report_ids = list(dict.fromkeys(req.report_ids))
+    try:
+        existing_res = await execute_read_async(
+            supabase.table("reports").select("report_id").in_("report_id", report_ids)
+        )
+        existing = {r["report_id"] for r in existing_res.data or []}
+
+        following_res = await execute_read_async(
+            supabase.table("report_followers")
+            .select("report_id")
+            .eq("user_id", user.id)
+            .in_("report_id", report_ids)
+        )
+        already = {r["report_id"] for r in following_res.data or []}
+
+        to_follow = [rid for rid in report_ids if rid in existing and rid not in already]
+        if to_follow:
+            await execute_write_async(supabase.table("report_followers").insert(
+                [{"report_id": rid, "user_id": user.id} for rid in to_follow]
+            ))
+            invalidate_follow_set(user.id)
+            for rid in to_follow:
+                trending_reports.record(rid, "follow")
+            await asyncio.to_thread(record_user_actions, user.id, "FOLLOW_REPORT", to_follow)
+    except BackendUnavailable:
+        raise
+    except Exception as e:
+        print(f"Bulk follow error: {str(e)}")
+        raise HTTPException(status_code=500, detail="Error following reports")
+
+    return _bulk_results(report_ids, set(to_follow), "followed", set(report_ids) - existing, "already_following")
+
+
+# Unfollow several reports at once
+@router.post("/unfollow/bulk", response_model=BulkResponse)
+async def bulk_unfollow_reports(req: ReportBulkFollowRequest, user=Depends(get_current_user)):
+    report_ids = list(dict.fromkeys(req.report_ids))
+    try:
+        removed = await execute_write_async(
+            supabase.table("report_followers")
+            .delete()
+            .eq("user_id", user.id)
+            .in_("report_id", report_ids)
+        )
+        unfollowed = {r["report_id"] for r in removed.data or []}
+        if unfollowed:
+            invalidate_follow_set(user.id)
+
+        await execute_write_async(
+            supabase.table("user_actions")
+            .delete()
+            .eq("user_id", user.id)
+            .eq("action_name", "FOLLOW_REPORT")
+            .in_("report_id", report_ids)
+        )
+        await execute_write_async(
+            supabase.table("report_helpers")
+            .delete()
+            .eq("user_id", user.id)
+            .in_("report_id", report_ids)
+        )
+    except BackendUnavailable:
+        raise
+    except Exception as e:
+        print(f"Bulk unfollow error: {str(e)}")
+        raise HTTPException(status_code=500, detail="Error unfollowing reports")
+
+    return _bulk_results(report_ids, unfollowed, "unfollowed", set(), "not_following")
+
+# Fetch comments (newest first, keyset paginated)
 @router.get("/comments/{report_id}")
-async def get_comments(report_id: int):
-    comments_res = (
+async def get_comments(
+    report_id: int,
+    limit: int = Query(20, ge=1, le=100),
+    before: int | None = None,
+):
+    query = (
         supabase.table("comments")
         .select(
             """
+            id,
             comment,
             created_at,
             users:user_id (
@@ -306,96 +456,182 @@ async def get_comments(report_id: int):
             """
         )
         .eq("report_id", report_id)
-        .order("created_at", desc=True)
-        .execute()
+    )
+    # Pass the last id of the previous page as `before`
+    if before is not None:
+        query = query.lt("id", before)
+
+    comments_res = await execute_read_async(
+        query.order("id", desc=True).limit(limit),
+        cache_key=f"comments:{report_id}:{limit}" if before is None else None,
+        hedge=before is None,
     )
 
     comments = comments_res.data if comments_res.data else []
-    return {"comments": comments}
+    next_cursor = comments[-1]["id"] if len(comments) == limit else None
+    return {"comments": comments, "next_cursor": next_cursor}
+
+
+# Fetch followers (newest first, keyset paginated)
+@router.get("/{report_id}/followers")
+async def get_followers(
+    report_id: int,
+    limit: int = Query(20, ge=1, le=100),
+    before: int | None = None,
+):
+    followers = await _fetch_followers_page(report_id, limit, before)
+    next_cursor = followers[-1]["id"] if len(followers) == limit else None
+    return {"followers": followers, "next_cursor": next_cursor}
 
 # Add comments on report post 
 @router.post("/comment/{report_id}")
-async def add_comment(req: ReportCommentRequest, user=Depends(get_current_user)):
-    try:
-        supabase.table("comments").insert(
-            {"report_id": req.report_id, "user_id": user.id, "comment": req.comment}
-        ).execute()
+async def add_comment(req: ReportCommentRequest, user=Depends(get_current_user), idempotency_key: str | None = Header(None, alias="Idempotency-Key")):
+    async def handle():
+        # Replays are answered before this, so they never spend a token
+        check_rate_limit("report_comment", user.id)
+        try:
+            comment_res = await execute_write_async(supabase.table("comments").insert(
+                {"report_id": req.report_id, "user_id": user.id, "comment": req.comment}
+            ))
+
+            metadata = user.user_metadata or {}
+            publish_report_event(req.report_id, "comment", {
+                "comment": req.comment,
+                "created_at": comment_res.data[0].get("created_at") if comment_res.data else None,
+                "users": {
+                    "name": metadata.get("full_name") or metadata.get("name") or "No Name",
+                    "avatar": metadata.get("avatar_url"),
+                },
+            })
+
+            # Update status to acknowledged if currently open
+            acknowledged_res = await execute_write_async(
+                supabase.table("reports").update({"status": "acknowledged"}).eq("report_id", req.report_id).eq("status", "open")
+            )
+            if acknowledged_res.data:
+                invalidate_report_list()
+                report_analytics.status_changed(acknowledged_res.data[0])
+                publish_report_event(req.report_id, "status", {"status": "acknowledged"})
 
-        # Update status to acknowledged if currently open
-        report_res = supabase.table("reports").select("status").eq("report_id", req.report_id).single().execute()
-        if report_res.data and report_res.data.get("status") == "open":
-            supabase.table("reports").update({"status": "acknowledged"}).eq("report_id", req.report_id).execute()
+            enqueue_report_notification(req.report_id, "comment", user.id, {"comment": req.comment[:140]})
+            trending_reports.record(req.report_id, "comment")
 
-        # Record action
-        record_user_action(user.id, "COMMENT_REPORT", req.report_id)
+            # Record action
+            await asyncio.to_thread(record_user_action, user.id, "COMMENT_REPORT", req.report_id)
 
-    except Exception as e:
-        print(f"Comment error: {str(e)}")
+        except BackendUnavailable:
+            raise
+        except Exception as e:
+            print(f"Comment error: {str(e)}")
+            raise HTTPException(status_code=500, detail="Error adding comment")
 
-    return {"message": "Comment added successfully"}
+        return {"message": "Comment added successfully"}
+
+    return await run_idempotent(user.id, "add_comment", idempotency_key, handle, req)
 
 # Mark issue as in progress 
 @router.post("/in-progress")
 async def in_progress_issue(req: ReportInProgressRequest, user=Depends(get_current_user)):
     try:
-        supabase.table("reports").update({"status": "in_progress"}).eq("report_id", req.report_id).execute()
-        supabase.table("report_helpers").insert({"report_id": req.report_id, "user_id": user.id}).execute()
+        # Filtered on the old status so only a real transition is counted
+        changed_res = await execute_write_async(
+            supabase.table("reports").update({"status": "in_progress"}).eq("report_id", req.report_id).neq("status", "in_progress")
+        )
+        await execute_write_async(supabase.table("report_helpers").insert({"report_id": req.report_id, "user_id": user.id}))
+        invalidate_report_list()
+        if changed_res.data:
+            report_analytics.status_changed(changed_res.data[0])
+        publish_report_event(req.report_id, "status", {"status": "in_progress"})
+        enqueue_report_notification(req.report_id, "status", user.id, {"status": "in_progress"})
+    except BackendUnavailable:
+        raise
     except Exception as e:
         print(f"In progress error: {str(e)}")
+        raise HTTPException(status_code=500, detail="Error marking issue in progress")
     return {"message": "Issue marked as in progress successfully"}
 
 # Mark issue as closed 
 @router.post("/close")
 async def close_issue(req: ReportCloseRequest, user=Depends(get_current_user)):
     try:
-        supabase.table("reports").update({"status": "in_progress","closed_by": user.id}).eq("report_id", req.report_id).execute()
+        changed_res = await execute_write_async(
+            supabase.table("reports").update({"status": "in_progress","closed_by": user.id}).eq("report_id", req.report_id).neq("status", "in_progress")
+        )
+        if changed_res.data:
+            report_analytics.status_changed(changed_res.data[0])
+        else:
+            await execute_write_async(supabase.table("reports").update({"closed_by": user.id}).eq("report_id", req.report_id))
+        invalidate_report_list()
+        publish_report_event(req.report_id, "status", {"status": "in_progress", "closed_by": user.id})
+        enqueue_report_notification(req.report_id, "status", user.id, {"status": "pending_verification"})
+    except BackendUnavailable:
+        raise
     except Exception as e:
         print(f"Close error: {str(e)}")
+        raise HTTPException(status_code=500, detail="Error closing issue")
     return {"message": "Issue closed successfully"}
 
 # Add community confirmation 
 @router.post("/community-verify")
-async def add_community_confirmation(req: ReportConfirmRequest, user=Depends(get_current_user)):
-    try:
-        # Check if user already verified
-        existing = supabase.table("community_confirmations").select("*").eq("report_id", req.report_id).eq("user_id", user.id).execute()
-        if existing.data:
-            raise HTTPException(status_code=400, detail="You have already verified this report")
+async def add_community_confirmation(req: ReportConfirmRequest, user=Depends(get_current_user), idempotency_key: str | None = Header(None, alias="Idempotency-Key")):
+    async def handle():
+        try:
+            # Check if user already verified
+            existing = await execute_read_async(supabase.table("community_confirmations").select("id").eq("report_id", req.report_id).eq("user_id", user.id).limit(1))
+            if existing.data:
+                raise HTTPException(status_code=400, detail="You have already verified this report")
 
-        # Check if user is following the report
-        is_following = supabase.table("report_followers").select("*").eq("report_id", req.report_id).eq("user_id", user.id).execute()
-        if not is_following.data:
-            raise HTTPException(status_code=400, detail="You must follow the report to verify it")
-        
-        # Insert verification
-        supabase.table("community_confirmations").insert(
-            {"report_id": req.report_id, "user_id": user.id}
-        ).execute()
-        
-        # Record action
-        record_user_action(user.id, "VERIFY_CLOSED", req.report_id)
-        
-        # Check count and update status if >= 3
-        confirmations = supabase.table("community_confirmations").select("*").eq("report_id", req.report_id).execute()
-        count = len(confirmations.data)
-        
-        if count >= 3:
-            supabase.table("reports").update({"status": "closed"}).eq("report_id", req.report_id).execute()
-            return {"message": "Issue verified and closed!", "count": count, "status": "closed"}
-        
-        return {"message": "Community confirmation added successfully", "count": count}
-    except HTTPException:
-        raise
-    except Exception as e:
-        print(f"Confirm error: {str(e)}")
-        raise HTTPException(status_code=500, detail="Error adding confirmation")
+            # Check if user is following the report
+            is_following = await execute_read_async(supabase.table("report_followers").select("id").eq("report_id", req.report_id).eq("user_id", user.id).limit(1))
+            if not is_following.data:
+                raise HTTPException(status_code=400, detail="You must follow the report to verify it")
+
+            # Insert verification
+            await execute_write_async(supabase.table("community_confirmations").insert(
+                {"report_id": req.report_id, "user_id": user.id}
+            ))
+
+            trending_reports.record(req.report_id, "confirmation")
+
+            # Record action
+            await asyncio.to_thread(record_user_action, user.id, "VERIFY_CLOSED", req.report_id)
+
+            # Check count and update status if >= 3
+            confirmations = await execute_read_async(
+                supabase.table("community_confirmations").select("id", count="exact", head=True).eq("report_id", req.report_id)
+            )
+            count = confirmations.count or 0
+
+            if count >= 3:
+                closed_res = await execute_write_async(
+                    supabase.table("reports").update({"status": "closed"}).eq("report_id", req.report_id).neq("status", "closed")
+                )
+                invalidate_report_list()
+                # Only the confirmation that actually closes the report counts as a resolution
+                if closed_res.data:
+                    report_analytics.status_changed(closed_res.data[0])
+                publish_report_event(req.report_id, "verify", {"count": count, "status": "closed"})
+                enqueue_report_notification(req.report_id, "status", user.id, {"status": "closed"})
+                return {"message": "Issue verified and closed!", "count": count, "status": "closed"}
+
+            publish_report_event(req.report_id, "verify", {"count": count})
+            return {"message": "Community confirmation added successfully", "count": count}
+        except (HTTPException, BackendUnavailable):
+            raise
+        except Exception as e:
+            print(f"Confirm error: {str(e)}")
+            raise HTTPException(status_code=500, detail="Error adding confirmation")
+
+    return await run_idempotent(user.id, "add_community_confirmation", idempotency_key, handle, req)
 
 # Community confirmations count for report 
 @router.get("/community-verify-status/{report_id}")
 async def get_community_verify_status(report_id: int, user=Depends(get_optional_user)):
     try:
         # Get confirmation count
-        confirmations = supabase.table("community_confirmations").select("*").eq("report_id", report_id).execute()
+        confirmations = await execute_read_async(
+            supabase.table("community_confirmations").select("user_id").eq("report_id", report_id)
+        )
         count = len(confirmations.data) if confirmations.data else 0
         
         # Check if current user has verified
@@ -404,7 +640,9 @@ async def get_community_verify_status(report_id: int, user=Depends(get_optional_
             has_verified = any(c.get("user_id") == user.id for c in confirmations.data) if confirmations.data else False
         
         # Get report to check closed_by
-        report = supabase.table("reports").select("closed_by, users!reports_closed_by_fkey(name, avatar)").eq("report_id", report_id).execute()
+        report = await execute_read_async(
+            supabase.table("reports").select("closed_by, users!reports_closed_by_fkey(name, avatar)").eq("report_id", report_id)
+        )
         
         closed_by_user = None
         if report.data and report.data[0].get("closed_by"):
@@ -426,36 +664,70 @@ async def get_community_verify_status(report_id: int, user=Depends(get_optional_
 
 
 # Flag a report
-@router.post("/{report_id}/flag")
+@router.post("/{report_id}/flag", dependencies=[Depends(rate_limit_user("report_flag"))])
 async def flag_report(req: ReportFlagRequest, user=Depends(get_current_user)):
     try:
         # Check if already flagged
-        existing = supabase.table("report_flags").select("*").eq("report_id", req.report_id).eq("user_id", user.id).execute()
+        existing = await execute_read_async(
+            supabase.table("report_flags").select("id").eq("report_id", req.report_id).eq("user_id", user.id).limit(1)
+        )
         if existing.data:
             raise HTTPException(status_code=400, detail="You have already flagged this report")
 
-        supabase.table("report_flags").insert(
+        await execute_write_async(supabase.table("report_flags").insert(
             {
                 "report_id": req.report_id, 
                 "user_id": user.id,
                 "reason": req.reason
             }
-        ).execute()
+        ))
         
         return {"message": "Report flagged successfully"}
-    except HTTPException:
+    except (HTTPException, BackendUnavailable):
         raise
     except Exception as e:
         print(f"Flag error: {str(e)}")
         raise HTTPException(status_code=500, detail="Error flagging report")
 
 
+# Moderate several reports at once (Admin)
+# Declared before /{report_id}/moderation so "admin" is not taken as a report id
+@router.patch("/admin/moderation", response_model=BulkResponse)
+async def bulk_moderate_reports(req: ReportBulkModerationRequest, user=Depends(get_current_admin)):
+    report_ids = list(dict.fromkeys(req.report_ids))
+    try:
+        updated_res = await execute_write_async(
+            supabase.table("reports")
+            .update({"moderation_status": req.status})
+            .in_("report_id", report_ids)
+        )
+    except BackendUnavailable:
+        raise
+    except Exception as e:
+        print(f"Bulk moderation error: {str(e)}")
+        raise HTTPException(status_code=500, detail="Error updating moderation status")
+
+    updated = {r["report_id"] for r in updated_res.data or []}
+    if updated:
+        invalidate_report_list()
+        for report_id in updated:
+            publish_report_event(report_id, "moderation", {"moderation_status": req.status})
+
+    return _bulk_results(report_ids, updated, "updated", set(report_ids) - updated, "not_found")
+
+
 # Moderate a report (Admin)
 @router.patch("/{report_id}/moderation")
 async def moderate_report(req: ReportModerationRequest, user=Depends(get_current_admin)):
     try:
-        supabase.table("reports").update({"moderation_status": req.status}).eq("report_id", req.report_id).execute()
+        await execute_write_async(
+            supabase.table("reports").update({"moderation_status": req.status}).eq("report_id", req.report_id)
+        )
+        invalidate_report_list()
+        publish_report_event(req.report_id, "moderation", {"moderation_status": req.status})
         return {"message": f"Report marked as {req.status}"}
+    except BackendUnavailable:
+        raise
     except Exception as e:
         print(f"Moderation error: {str(e)}")
         raise HTTPException(status_code=500, detail="Error updating moderation status")
@@ -466,21 +738,21 @@ async def moderate_report(req: ReportModerationRequest, user=Depends(get_current
 async def admin_get_stats(user=Depends(get_current_admin)):
     try:
         # Total reports
-        total_res = supabase.table("reports").select("report_id", count="exact").execute()
+        total_res = await execute_read_async(supabase.table("reports").select("report_id", count="exact", head=True))
         total = total_res.count if total_res.count is not None else 0
         
         # Flagged reports (unique reports with flags)
         # simplistic count for separate table isn't direct in 1 query without join, but we can count distinct report_ids in flags
         # For now, let's get count of flags
-        flags_res = supabase.table("report_flags").select("report_id", count="exact").execute()
+        flags_res = await execute_read_async(supabase.table("report_flags").select("report_id", count="exact", head=True))
         flagged_count = flags_res.count if flags_res.count is not None else 0
         
         # Pending verifications (in progress)
-        pending_res = supabase.table("reports").select("report_id", count="exact").eq("status", "in_progress").execute()
+        pending_res = await execute_read_async(supabase.table("reports").select("report_id", count="exact", head=True).eq("status", "in_progress"))
         pending = pending_res.count if pending_res.count is not None else 0
         
         # Active reports
-        active_res = supabase.table("reports").select("report_id", count="exact").eq("moderation_status", "active").execute()
+        active_res = await execute_read_async(supabase.table("reports").select("report_id", count="exact", head=True).eq("moderation_status", "active"))
         active = active_res.count if active_res.count is not None else 0
 
         return {
@@ -489,17 +761,35 @@ async def admin_get_stats(user=Depends(get_current_admin)):
             "pending_verifications": pending,
             "active_reports": active
         }
+    except BackendUnavailable:
+        raise
     except Exception as e:
         print(f"Stats error: {str(e)}")
         return {"error": str(e)}
 
 
+# Admin: Analytics (precomputed daily rollups)
+@router.get("/admin/analytics")
+async def admin_get_analytics(
+    granularity: Literal["day", "week"] = "day",
+    days: int = Query(90, ge=1, le=366),
+    user=Depends(get_current_admin),
+):
+    try:
+        return report_analytics.series(granularity, days)
+    except BackendUnavailable:
+        raise
+    except Exception as e:
+        print(f"Analytics error: {str(e)}")
+        raise HTTPException(status_code=500, detail="Error fetching analytics")
+
+
 # Admin: List reports
 @router.get("/admin/list")
 async def admin_list_reports(user=Depends(get_current_admin)):
     try:
         # Get all reports with flag count
-        result = (
+        result = await execute_read_async(
             supabase.table("reports")
             .select(
                 """
@@ -509,7 +799,6 @@ async def admin_list_reports(user=Depends(get_current_admin)):
                 """
             )
             .order("created_at", desc=True)
-            .execute()
         )
         
         reports = []
@@ -527,6 +816,38 @@ async def admin_list_reports(user=Depends(get_current_admin)):
         reports.sort(key=lambda x: x["flag_count"], reverse=True)
         
         return {"reports": reports}
+    except BackendUnavailable:
+        raise
     except Exception as e:
         print(f"Admin list error: {str(e)}")
         raise HTTPException(status_code=500, detail="Error fetching admin reports")
+
+
+# Admin: Export reports (streamed)
+@router.get("/admin/export")
+async def admin_export_reports(
+    format: Literal["csv", "parquet"] = "csv",
+    created_from: datetime | None = Query(None, alias="from"),
+    created_to: datetime | None = Query(None, alias="to"),
+    user=Depends(get_current_admin),
+):
+    pages = iter_report_pages(created_from, created_to)
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%d-%H%M%S")
+
+    if format == "parquet":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise HTTPException(status_code=501, detail="Parquet export is not available on this server")
+        body = stream_parquet(pages)
+        media_type = "application/vnd.apache.parquet"
+    else:
+        body = stream_csv(pages)
+        media_type = "text/csv"
+
+    # Sync generators run in the threadpool, so paging never blocks the event loop
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="reports-{stamp}.{format}"'},
+    )
@@ -1,15 +1,69 @@
-from fastapi import APIRouter, Depends, HTTPException
-from app.services.supabase_client import supabase
-from app.dependencies.auth import get_current_user
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, Query
+from app.services.supabase_client import supabase, execute_read, execute_read_async, execute_write_async
+from app.dependencies.auth import get_current_user, get_optional_user
+from app.services.leaderboard import leaderboard
+from app.services.resilience import BackendUnavailable
+from typing import Literal
 
 router = APIRouter(
     prefix="/user",
 )
 
+ACTION_COLUMNS = "id, action_name, report_id, created_at, points"
+MY_REPORT_COLUMNS = "report_id, title, description, category, status, photo_url, location, moderation_status, created_at, updated_at"
+
+
+def _fetch_profile(user_id: str):
+    return execute_read(supabase.table("users").select("*").eq("user_id", user_id).single()).data
+
+
+def _fetch_actions(user_id: str, limit: int, before: int | None = None):
+    # Points are stored on the action row, so no per-row join with user_points
+    query = supabase.table("user_actions").select(ACTION_COLUMNS).eq("user_id", user_id)
+    if before is not None:
+        query = query.lt("id", before)
+    return execute_read(query.order("id", desc=True).limit(limit)).data or []
+
+
+def _fetch_my_reports(user_id: str, limit: int, before: int | None = None):
+    query = supabase.table("reports").select(MY_REPORT_COLUMNS).eq("created_by", user_id)
+    if before is not None:
+        query = query.lt("report_id", before)
+    return execute_read(query.order("report_id", desc=True).limit(limit)).data or []
+
+
+def _fetch_badges(user_id: str):
+    return execute_read(
+        supabase.table("user_badges")
+        .select("""
+            *,
+            badge:badges(*)
+        """)
+        .eq("user_id", user_id)
+    ).data or []
+
+
+def _count_actions(user_id: str, action_name: str) -> int:
+    res = execute_read(
+        supabase.table("user_actions")
+        .select("id", count="exact", head=True)
+        .eq("user_id", user_id)
+        .eq("action_name", action_name)
+    )
+    return res.count or 0
+
+
+def _next_cursor(rows: list, key: str, limit: int):
+    return rows[-1][key] if len(rows) == limit else None
+
+
 @router.get("/me")
 async def get_me(user = Depends(get_current_user)):
     try: 
-        supabase_user = supabase.table("users").select("*").eq("user_id", user.id).single().execute()
+        supabase_user = await execute_read_async(supabase.table("users").select("*").eq("user_id", user.id).single())
+    except BackendUnavailable:
+        raise
     except Exception as e:
         print(f"Error fetching user data: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to fetch user data")
@@ -17,81 +71,177 @@ async def get_me(user = Depends(get_current_user)):
     return supabase_user.data
 
 @router.get("/actions")
-async def get_user_actions(user = Depends(get_current_user)):
+async def get_user_actions(
+    limit: int = Query(50, ge=1, le=200),
+    before: int | None = None,
+    user = Depends(get_current_user),
+):
     try:
-        # Select all actions for the user
-        # Include points from user_points
-        result = (
-            supabase.table("user_actions")
-            .select("""
-                *,
-                points:user_points(points)
-            """)
-            .eq("user_id", user.id)
-            .execute()
-        )
+        actions = await asyncio.to_thread(_fetch_actions, user.id, limit, before)
+        total_res = await execute_read_async(supabase.table("users").select("points").eq("user_id", user.id))
+    except BackendUnavailable:
+        raise
     except Exception as e:
         print(f"Error fetching user actions: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to fetch user actions")
 
-    # Clean response: include action info + points
-    actions_with_points = []
-    for action in result.data:
-        points_list = action.get("points", [])
-        points = points_list[0]["points"] if points_list else 0
-        actions_with_points.append({
-            "id": action["id"],
-            "action_name": action["action_name"],
-            "report_id": action.get("report_id"),
-            "created_at": action["created_at"],
-            "points": points
-        })
-
-    return {"actions": actions_with_points}
+    total_points = total_res.data[0]["points"] if total_res.data else 0
+
+    return {
+        "actions": actions,
+        "total_points": total_points,
+        "next_cursor": _next_cursor(actions, "id", limit),
+    }
 
 @router.get("/my-reports")
-async def get_my_reports(user = Depends(get_current_user)):
+async def get_my_reports(
+    limit: int = Query(50, ge=1, le=200),
+    before: int | None = None,
+    user = Depends(get_current_user),
+):
+    # Keyset pagination: pass the last report_id of the previous page as `before`
     try:
-        result = (
-            supabase.table("reports")
-            .select("*")
-            .eq("created_by", user.id)
-            .execute()
-        )
+        reports = await asyncio.to_thread(_fetch_my_reports, user.id, limit, before)
+    except BackendUnavailable:
+        raise
     except Exception as e:
         print(f"Error fetching user reports: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to fetch user reports")
-    
-    return result.data
+
+    return reports
+
+@router.get("/summary")
+async def get_user_summary(
+    actions_limit: int = Query(20, ge=1, le=100),
+    reports_limit: int = Query(20, ge=1, le=100),
+    user = Depends(get_current_user),
+):
+    """Everything the profile page needs, fetched concurrently behind one auth check."""
+    try:
+        profile, actions, reports, badges, reports_created, verified = await asyncio.gather(
+            asyncio.to_thread(_fetch_profile, user.id),
+            asyncio.to_thread(_fetch_actions, user.id, actions_limit),
+            asyncio.to_thread(_fetch_my_reports, user.id, reports_limit),
+            asyncio.to_thread(_fetch_badges, user.id),
+            asyncio.to_thread(_count_actions, user.id, "CREATE_REPORT"),
+            asyncio.to_thread(_count_actions, user.id, "VERIFY_CLOSED"),
+        )
+    except BackendUnavailable:
+        raise
+    except Exception as e:
+        print(f"Error fetching user summary: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to fetch user summary")
+
+    return {
+        "user": profile,
+        "total_points": (profile or {}).get("points") or 0,
+        "stats": {
+            "reports_created": reports_created,
+            "reports_verified": verified,
+        },
+        "actions": actions,
+        "actions_next_cursor": _next_cursor(actions, "id", actions_limit),
+        "my_reports": reports,
+        "my_reports_next_cursor": _next_cursor(reports, "report_id", reports_limit),
+        "badges": badges,
+    }
 
 @router.get("/badges")
 async def get_user_badges(user = Depends(get_current_user)):
     try:
-        result = (
-            supabase.table("user_badges")
-            .select("""
-                *,
-                badge:badges(*)
-            """)
-            .eq("user_id", user.id)
-            .execute()
-        )
+        badges = await asyncio.to_thread(_fetch_badges, user.id)
+    except BackendUnavailable:
+        raise
     except Exception as e:
         print(f"Error fetching user badges: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to fetch user badges")
     
-    return {"badges": result.data}
+    return {"badges": badges}
 
 @router.get("/all-badges")
 async def get_all_badges():
     try:
-        result = (
+        result = await execute_read_async(
             supabase.table("badges")
-            .select("*")
-            .execute()
+            .select("*"),
+            cache_key="all_badges",
         )
+    except BackendUnavailable:
+        raise
     except Exception as e:
         print(f"Error fetching all badges: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to fetch all badges")
     
-    return {"badges": result.data}
\ No newline at end of file
+    return {"badges": result.data}
+
+@router.get("/notifications")
+async def get_notifications(
+    limit: int = Query(20, ge=1, le=100),
+    before: int | None = None,
+    user = Depends(get_current_user),
+):
+    try:
+        query = (
+            supabase.table("notifications")
+            .select("id, report_id, event, payload, is_read, created_at")
+            .eq("user_id", user.id)
+        )
+        # Keyset pagination: pass the last id of the previous page as `before`
+        if before is not None:
+            query = query.lt("id", before)
+        result = await execute_read_async(query.order("id", desc=True).limit(limit))
+
+        unread_res = await execute_read_async(
+            supabase.table("notifications")
+            .select("id", count="exact", head=True)
+            .eq("user_id", user.id)
+            .eq("is_read", False)
+        )
+    except BackendUnavailable:
+        raise
+    except Exception as e:
+        print(f"Error fetching notifications: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to fetch notifications")
+
+    notifications = result.data or []
+    next_cursor = notifications[-1]["id"] if len(notifications) == limit else None
+
+    return {
+        "notifications": notifications,
+        "unread_count": unread_res.count or 0,
+        "next_cursor": next_cursor,
+    }
+
+@router.post("/notifications/read")
+async def mark_notifications_read(user = Depends(get_current_user)):
+    try:
+        await execute_write_async(
+            supabase.table("notifications")
+            .update({"is_read": True})
+            .eq("user_id", user.id)
+            .eq("is_read", False)
+        )
+    except BackendUnavailable:
+        raise
+    except Exception as e:
+        print(f"Error marking notifications read: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to update notifications")
+
+    return {"message": "Notifications marked as read"}
+
+@router.get("/leaderboard")
+async def get_leaderboard(
+    window: Literal["all", "week", "month"] = "all",
+    limit: int = Query(10, ge=1, le=100),
+    user = Depends(get_optional_user),
+):
+    try:
+        leaders = leaderboard.top(window, limit)
+        my_rank = leaderboard.rank_of(window, user.id) if user else None
+    except BackendUnavailable:
+        raise
+    except Exception as e:
+        print(f"Error building leaderboard: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to fetch leaderboard")
+
+    return {"window": window, "leaders": leaders, "my_rank": my_rank}
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 from datetime import datetime
 from uuid import UUID
 from typing import Optional, List
@@ -33,6 +33,7 @@ class Report(ReportBase):
     users: Optional[UserMinimal] = None
     is_following: Optional[bool] = False
     followers_count: Optional[int] = 0
+    comments_count: Optional[int] = 0
     
     model_config = ConfigDict(from_attributes=True)
 
@@ -47,6 +48,12 @@ class ReportDetailResponse(BaseModel):
 class ReportListResponse(BaseModel):
     reports: List[Report]
 
+class TrendingReport(Report):
+    hotness: float
+
+class TrendingReportListResponse(BaseModel):
+    reports: List[TrendingReport]
+
 class ReportFollowRequest(BaseModel):
     report_id: int
 
@@ -70,3 +77,18 @@ class ReportFlagRequest(BaseModel):
 class ReportModerationRequest(BaseModel):
     report_id: int
     status: str
+
+class ReportBulkFollowRequest(BaseModel):
+    report_ids: List[int] = Field(..., min_length=1, max_length=200)
+
+class ReportBulkModerationRequest(BaseModel):
+    report_ids: List[int] = Field(..., min_length=1, max_length=500)
+    status: str
+
+class BulkItemResult(BaseModel):
+    report_id: int
+    result: str
+
+class BulkResponse(BaseModel):
+    results: List[BulkItemResult]
+    succeeded: int
@@ -0,0 +1,280 @@
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import date, datetime, timedelta, timezone
+from app.services.supabase_client import supabase, execute_read
+from app.services.shared_state import get_or_load, last_loaded
+from app.services.background import PeriodicRefresh
+from app.services.resilience import BackendUnavailable
+from app.services.event_bus import on_model_event, publish_model_event, read_model_events, last_model_event_id
+from app.utils.timestamps import parse_timestamp
+
+# Daily rollups for the admin dashboard.
+# Report writes update their day's bucket incrementally in every worker,
+# through the shared event log; a backfill from the database seeds the
+# buckets (and periodically corrects any drift), so chart requests only ever
+# read precomputed buckets. Both paths date a status change by the time in
+# report_status_history, which the database also returns as the updated
+# report's updated_at. The backfill runs in a background task, and its
+# buckets are shared between workers for a few minutes, so only one of them
+# pays for a backfill at a time; a backfill replays the writes logged since,
+# and a recycled worker starts from the last good buckets while it backfills.
+
+PAGE_SIZE = 1000
+REBUILD_SECONDS = 15 * 60
+REFRESH_TICK_SECONDS = 60
+SNAPSHOT_KEY = "analytics:buckets"
+SNAPSHOT_TTL_SECONDS = 5 * 60
+SNAPSHOT_KEEP_SECONDS = 24 * 3600
+UPDATE_CHANNEL = "analytics_updates"
+RETENTION_DAYS = 400
+
+# Upper bounds (hours) of the resolution-time histogram bins; the last is open
+RESOLUTION_BINS_HOURS = [1, 6, 24, 72, 168, 336, 720, None]
+
+
+def _bin_index(hours: float) -> int:
+    for index, upper in enumerate(RESOLUTION_BINS_HOURS):
+        if upper is None or hours < upper:
+            return index
+    return len(RESOLUTION_BINS_HOURS) - 1
+
+
+def median_from_histogram(histogram: list):
+    """Approximate median (hours), interpolating linearly inside the median bin."""
+    total = sum(histogram)
+    if not total:
+        return None
+
+    half = total / 2
+    cumulative = 0
+    lower = 0
+    for count, upper in zip(histogram, RESOLUTION_BINS_HOURS):
+        if count and cumulative + count >= half:
+            if upper is None:
+                return float(lower)
+            return round(lower + (upper - lower) * (half - cumulative) / count, 2)
+        cumulative += count
+        lower = upper if upper is not None else lower
+    return float(lower)
+
+
+class DailyBucket:
+    def __init__(self):
+        self.created = Counter()          # category -> reports created
+        self.status_changes = Counter()   # status -> transitions into it
+        self.resolution = [0] * len(RESOLUTION_BINS_HOURS)
+
+    def merge(self, other: "DailyBucket"):
+        self.created.update(other.created)
+        self.status_changes.update(other.status_changes)
+        self.resolution = [a + b for a, b in zip(self.resolution, other.resolution)]
+
+    def to_dict(self) -> dict:
+        return {
+            "created": dict(self.created),
+            "status_changes": dict(self.status_changes),
+            "resolution": self.resolution,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "DailyBucket":
+        bucket = cls()
+        bucket.created.update(data["created"])
+        bucket.status_changes.update(data["status_changes"])
+        bucket.resolution = list(data["resolution"])
+        return bucket
+
+
+class ReportAnalytics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._built_at = None
+        # Last update event applied; replayed and relayed updates at or below it are skipped
+        self._applied_id = 0
+        self._buckets = defaultdict(DailyBucket)
+
+    def _today(self) -> date:
+        return datetime.now(timezone.utc).date()
+
+    def _record_created(self, buckets, day: date, category: str | None):
+        buckets[day].created[category or "uncategorized"] += 1
+
+    def _record_resolution(self, buckets, created_at: datetime, closed_at: datetime):
+        hours = max(0.0, (closed_at - created_at).total_seconds() / 3600)
+        buckets[closed_at.date()].resolution[_bin_index(hours)] += 1
+
+    def _build_buckets(self):
+        """Build every bucket from the reports and report_status_history tables."""
+        buckets = defaultdict(DailyBucket)
+        since = self._today() - timedelta(days=RETENTION_DAYS)
+        created = {}
+
+        last_id = 0
+        while True:
+            res = execute_read(
+                supabase.table("reports")
+                .select("report_id, category, created_at")
+                .gt("report_id", last_id)
+                .order("report_id")
+                .limit(PAGE_SIZE)
+            )
+            rows = res.data or []
+            for r in rows:
+                created_at = parse_timestamp(r["created_at"])
+                created[r["report_id"]] = created_at
+                if created_at.date() >= since:
+                    self._record_created(buckets, created_at.date(), r.get("category"))
+            if len(rows) < PAGE_SIZE:
+                break
+            last_id = rows[-1]["report_id"]
+
+        last_id = 0
+        while True:
+            res = execute_read(
+                supabase.table("report_status_history")
+                .select("id, report_id, status, changed_at")
+                .gte("changed_at", since.isoformat())
+                .gt("id", last_id)
+                .order("id")
+                .limit(PAGE_SIZE)
+            )
+            rows = res.data or []
+            for h in rows:
+                changed_at = parse_timestamp(h["changed_at"])
+                buckets[changed_at.date()].status_changes[h["status"]] += 1
+                if h["status"] == "closed" and h["report_id"] in created:
+                    self._record_resolution(buckets, created[h["report_id"]], changed_at)
+            if len(rows) < PAGE_SIZE:
+                break
+            last_id = rows[-1]["id"]
+
+        return buckets
+
+    def _fetch_snapshot(self) -> dict:
+        # Taken first: updates logged during the read are replayed on top
+        event_id = last_model_event_id()
+        # Buckets shared as { "YYYY-MM-DD": bucket dict } so the snapshot is plain JSON
+        buckets = {day.isoformat(): bucket.to_dict() for day, bucket in self._build_buckets().items()}
+        return {"event_id": event_id, "buckets": buckets}
+
+    def _snapshot(self) -> dict:
+        return get_or_load(SNAPSHOT_KEY, self._fetch_snapshot, SNAPSHOT_TTL_SECONDS, keep_last=SNAPSHOT_KEEP_SECONDS)
+
+    def warm(self):
+        """Fill the shared snapshot without loading this process's buckets."""
+        self._snapshot()
+
+    def _build(self, snapshot: dict, stale: bool = False):
+        buckets = defaultdict(DailyBucket)
+        for day, data in snapshot["buckets"].items():
+            buckets[date.fromisoformat(day)] = DailyBucket.from_dict(data)
+
+        with self._lock:
+            self._buckets = buckets
+            self._applied_id = snapshot["event_id"]
+            for event_id, update in read_model_events(UPDATE_CHANNEL, self._applied_id):
+                self._apply(event_id, update)
+            # Buckets from the last good snapshot are due for a backfill at once
+            self._built_at = time.monotonic() - (REBUILD_SECONDS if stale else 0)
+
+    def backfill(self):
+        self._build(self._snapshot())
+
+    def refresh(self):
+        if self._built_at is None:
+            last = last_loaded(SNAPSHOT_KEY)
+            if last is not None:
+                # Serve the last good buckets while the backfill below runs
+                self._build(last, stale=True)
+        if self._built_at is None or time.monotonic() - self._built_at >= REBUILD_SECONDS:
+            self.backfill()
+
+    def _ensure_built(self):
+        if self._built_at is None:
+            raise BackendUnavailable("Analytics are still loading", retry_after=REFRESH_TICK_SECONDS)
+
+    def _at(self, timestamp: str | None) -> datetime:
+        return parse_timestamp(timestamp) if timestamp else datetime.now(timezone.utc)
+
+    # Incremental updates from report writes, dated by the row the write
+    # returned and applied in every worker. Before the first backfill there
+    # is nothing to keep current, and the backfill will see these writes anyway.
+
+    def report_created(self, category: str | None, created_at: str | None):
+        publish_model_event(UPDATE_CHANNEL, ["created", category, self._at(created_at).isoformat()])
+
+    def status_changed(self, report: dict):
+        """Count a transition from the updated report row (status, updated_at)."""
+        publish_model_event(UPDATE_CHANNEL, [
+            "status",
+            report["status"],
+            self._at(report.get("updated_at")).isoformat(),
+            report.get("created_at"),
+        ])
+
+    def _apply(self, event_id: int, update: list):
+        # Caller holds the lock
+        if event_id <= self._applied_id:
+            return
+        if update[0] == "created":
+            _, category, created_at = update
+            self._record_created(self._buckets, parse_timestamp(created_at).date(), category)
+        else:
+            _, status, changed_at, created_at = update
+            changed_at = parse_timestamp(changed_at)
+            self._buckets[changed_at.date()].status_changes[status] += 1
+            if status == "closed" and created_at:
+                self._record_resolution(self._buckets, parse_timestamp(created_at), changed_at)
+        self._applied_id = event_id
+
+    def on_update(self, event_id: int, update: list):
+        with self._lock:
+            if self._built_at is None:
+                return
+            self._apply(event_id, update)
+
+    def series(self, granularity: str, days: int) -> dict:
+        self._ensure_built()
+
+        today = self._today()
+        start = today - timedelta(days=days - 1)
+        periods = {}
+        with self._lock:
+            for offset in range(days):
+                day = start + timedelta(days=offset)
+                key = day if granularity == "day" else day - timedelta(days=day.weekday())
+                period = periods.setdefault(key, DailyBucket())
+                if day in self._buckets:
+                    period.merge(self._buckets[day])
+
+        overall = [0] * len(RESOLUTION_BINS_HOURS)
+        points = []
+        for key in sorted(periods):
+            bucket = periods[key]
+            overall = [a + b for a, b in zip(overall, bucket.resolution)]
+            points.append({
+                "period": key.isoformat(),
+                "created": dict(bucket.created),
+                "created_total": sum(bucket.created.values()),
+                "status_changes": dict(bucket.status_changes),
+                "resolved": sum(bucket.resolution),
+                "median_resolution_hours": median_from_histogram(bucket.resolution),
+            })
+
+        return {
+            "granularity": granularity,
+            "from": start.isoformat(),
+            "to": today.isoformat(),
+            "series": points,
+            "resolution_histogram": {
+                "bins_hours": RESOLUTION_BINS_HOURS,
+                "counts": overall,
+                "median_hours": median_from_histogram(overall),
+            },
+        }
+
+
+report_analytics = ReportAnalytics()
+on_model_event(UPDATE_CHANNEL, report_analytics.on_update)
+analytics_refresh = PeriodicRefresh("Analytics", report_analytics.refresh, REFRESH_TICK_SECONDS)
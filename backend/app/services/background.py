@@ -0,0 +1,35 @@
+import asyncio
+
+# Periodic refresh of in-memory read models.
+# Each refresh runs in a thread, off the event loop, so requests only ever
+# read the structures it swaps in.
+
+
+class PeriodicRefresh:
+    def __init__(self, name: str, refresh, interval_seconds: float):
+        self.name = name
+        self.refresh = refresh
+        self.interval_seconds = interval_seconds
+        self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.to_thread(self.refresh)
+            except Exception as e:
+                print(f"{self.name} refresh error: {str(e)}")
+            await asyncio.sleep(self.interval_seconds)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
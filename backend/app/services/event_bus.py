@@ -0,0 +1,147 @@
+import asyncio
+from collections import defaultdict
+from app.services.shared_state import shared_events, is_shared
+
+# In-process pub/sub for live report updates.
+# Every SSE connection owns a bounded queue; publishers never block, and a slow
+# client only ever loses its own oldest events.
+# With several workers, events go through the shared event log instead and a
+# relay task in each worker replays them to its own subscribers, so a stream
+# sees writes handled by any worker.
+# The same log carries updates for the in-memory read models (leaderboard,
+# trending, analytics): publish_model_event delivers one to the channel's
+# handler in every worker, and a model rebuilt from an older snapshot
+# replays what it missed with read_model_events.
+
+MAX_STREAMS_PER_WORKER = 500
+SUBSCRIBER_QUEUE_SIZE = 32
+RELAY_POLL_SECONDS = 0.25
+RELAY_CHANNEL = "report_events"
+
+_relay_task = None
+# { channel: handler(event_id, payload) }
+_model_handlers = {}
+
+
+class StreamLimitReached(Exception):
+    pass
+
+
+class ReportEventBus:
+    def __init__(self, max_streams: int = MAX_STREAMS_PER_WORKER, queue_size: int = SUBSCRIBER_QUEUE_SIZE):
+        self.max_streams = max_streams
+        self.queue_size = queue_size
+        # { report_id: set(asyncio.Queue) }
+        self._subscribers = defaultdict(set)
+        self._open_streams = 0
+
+    @property
+    def open_streams(self) -> int:
+        return self._open_streams
+
+    def subscribe(self, report_id: int) -> asyncio.Queue:
+        if self._open_streams >= self.max_streams:
+            raise StreamLimitReached()
+
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers[report_id].add(queue)
+        self._open_streams += 1
+        return queue
+
+    def unsubscribe(self, report_id: int, queue: asyncio.Queue):
+        subscribers = self._subscribers.get(report_id)
+        if not subscribers or queue not in subscribers:
+            return
+
+        subscribers.discard(queue)
+        self._open_streams -= 1
+        if not subscribers:
+            del self._subscribers[report_id]
+
+    def publish(self, report_id: int, event: str, data: dict | None = None):
+        subscribers = self._subscribers.get(int(report_id))
+        if not subscribers:
+            return
+
+        message = {"event": event, "data": data or {}}
+        for queue in subscribers:
+            # Backpressure: drop the oldest pending event for this connection only
+            if queue.full():
+                try:
+                    queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    pass
+            queue.put_nowait(message)
+
+
+report_events = ReportEventBus()
+
+
+def publish_report_event(report_id: int, event: str, data: dict | None = None):
+    try:
+        if is_shared:
+            shared_events.append_event(RELAY_CHANNEL, [int(report_id), event, data])
+        else:
+            report_events.publish(report_id, event, data)
+    except Exception as e:
+        print(f"Event publish error: {str(e)}")
+
+
+def on_model_event(channel: str, handler):
+    """Register handler(event_id, payload) for a read-model channel in this worker."""
+    _model_handlers[channel] = handler
+
+
+def publish_model_event(channel: str, payload):
+    """Apply a read-model update in every worker, this one included."""
+    event_id = shared_events.append_event(channel, payload)
+    if not is_shared:
+        # No relay in a single process; apply it here
+        _model_handlers[channel](event_id, payload)
+
+
+def read_model_events(channel: str, after_id: int) -> list:
+    """[(event_id, payload)] still in the log for channel, oldest first."""
+    return [(event_id, payload) for event_id, _, payload in shared_events.read_events(after_id, channel)]
+
+
+def last_model_event_id() -> int:
+    return shared_events.last_event_id()
+
+
+async def _relay_events():
+    last_id = await asyncio.to_thread(shared_events.last_event_id)
+    while True:
+        await asyncio.sleep(RELAY_POLL_SECONDS)
+        try:
+            events = await asyncio.to_thread(shared_events.read_events, last_id)
+        except Exception as e:
+            print(f"Event relay error: {str(e)}")
+            continue
+        for event_id, channel, payload in events:
+            last_id = event_id
+            try:
+                if channel == RELAY_CHANNEL:
+                    report_events.publish(*payload)
+                elif channel in _model_handlers:
+                    _model_handlers[channel](event_id, payload)
+            except Exception as e:
+                print(f"Event relay error ({channel}): {str(e)}")
+
+
+def start_event_relay():
+    global _relay_task
+    if is_shared and _relay_task is None:
+        _relay_task = asyncio.create_task(_relay_events())
+
+
+async def stop_event_relay():
+    global _relay_task
+    if _relay_task is None:
+        return
+    _relay_task.cancel()
+    try:
+        await _relay_task
+    except asyncio.CancelledError:
+        pass
+    _relay_task = None
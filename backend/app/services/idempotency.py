@@ -0,0 +1,115 @@
+import asyncio
+import hashlib
+import json
+import time
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from app.services.shared_state import shared_state
+
+# Idempotency-Key support for POSTs that offline clients replay.
+# The first request with a key runs; its response is kept for a bounded time
+# and returned to any retry with the same key. Duplicates that arrive while
+# the original is still running wait for it instead of repeating its writes.
+# Responses and in-progress claims live in the shared store, so a retry that
+# lands on another worker is still answered from the first run.
+# Each key is bound to a fingerprint of the request payload; reusing a key
+# for a different request is rejected with 422 rather than answered with the
+# first request's response.
+
+IDEMPOTENCY_TTL_SECONDS = 24 * 3600
+MAX_KEY_LENGTH = 255
+# A claim outlives any single request; a crashed worker's claim lapses after this
+CLAIM_TTL_SECONDS = 60
+CLAIM_POLL_SECONDS = 0.1
+
+# { key: (fingerprint, asyncio.Future) } for requests still running in this worker
+_in_flight = {}
+
+
+def _shared_key(key: tuple) -> str:
+    return "idempotency:" + hashlib.sha256("\x1f".join(key).encode()).hexdigest()
+
+
+def _fingerprint(payload) -> str:
+    encoded = json.dumps(jsonable_encoder(payload), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+def _check_fingerprint(stored: str, fingerprint: str):
+    if stored != fingerprint:
+        raise HTTPException(
+            status_code=422,
+            detail="Idempotency-Key was already used for a different request",
+        )
+
+
+def _replay(stored: dict, fingerprint: str):
+    _check_fingerprint(stored["fingerprint"], fingerprint)
+    return stored["result"]
+
+
+async def _wait_for_other_worker(shared_key: str):
+    """Poll until another worker's claim resolves; None if it gave up without a response."""
+    deadline = time.monotonic() + CLAIM_TTL_SECONDS
+    while time.monotonic() < deadline:
+        await asyncio.sleep(CLAIM_POLL_SECONDS)
+        stored = shared_state.get(shared_key)
+        if stored is not None:
+            return stored
+        if shared_state.get(shared_key + ":claim") is None:
+            return None
+    return None
+
+
+async def run_idempotent(user_id: str, operation: str, idempotency_key: str | None, handler, payload=None):
+    """Run handler() at most once per (user, operation, key) and replay its result.
+
+    payload is the request content the key stands for; a replay whose payload
+    differs gets 422. Failures are not stored, so a retry after an error runs again.
+    """
+    if not idempotency_key:
+        return await handler()
+
+    key = (str(user_id), operation, idempotency_key[:MAX_KEY_LENGTH])
+    shared_key = _shared_key(key)
+    fingerprint = _fingerprint(payload)
+
+    stored = shared_state.get(shared_key)
+    if stored is not None:
+        return _replay(stored, fingerprint)
+
+    pending = _in_flight.get(key)
+    if pending is not None:
+        _check_fingerprint(pending[0], fingerprint)
+        # shield: a disconnecting duplicate must not cancel the original
+        return await asyncio.shield(pending[1])
+
+    # Another worker holds the claim: wait for its response, or take over if it failed
+    while not shared_state.add(shared_key + ":claim", fingerprint, CLAIM_TTL_SECONDS):
+        claimed = shared_state.get(shared_key + ":claim")
+        if claimed is not None:
+            _check_fingerprint(claimed, fingerprint)
+        stored = await _wait_for_other_worker(shared_key)
+        if stored is not None:
+            return _replay(stored, fingerprint)
+
+    future = asyncio.get_running_loop().create_future()
+    _in_flight[key] = (fingerprint, future)
+    try:
+        result = await handler()
+    except BaseException as e:
+        future.set_exception(e)
+        # Mark retrieved so an unawaited failure is not logged as lost
+        future.exception()
+        raise
+    else:
+        shared_state.set(
+            shared_key,
+            {"fingerprint": fingerprint, "result": jsonable_encoder(result)},
+            IDEMPOTENCY_TTL_SECONDS,
+        )
+        future.set_result(result)
+        return result
+    finally:
+        _in_flight.pop(key, None)
+        shared_state.delete(shared_key + ":claim")
@@ -0,0 +1,272 @@
+import threading
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from sortedcontainers import SortedList
+from app.services.supabase_client import supabase
+from app.services.shared_state import get_or_load, last_loaded
+from app.services.background import PeriodicRefresh
+from app.services.resilience import BackendUnavailable
+from app.services.event_bus import on_model_event, publish_model_event, read_model_events, last_model_event_id
+
+# In-memory points leaderboard.
+# Loaded from the database once per worker, then kept current by awards,
+# so reads never sort the users table. Every award goes through the shared
+# event log and is applied by every worker, so all of them rank the same.
+# Loading and reloading happen in a background task; requests only look up
+# ranks. The raw rows are shared between workers for a few minutes, so a
+# fleet of freshly started workers reads the tables once rather than once
+# each; a load replays the awards made since its rows were read. The last
+# good rows are kept longer, so a recycled worker starts from them while it
+# reloads.
+
+WINDOW_DAYS = {"week": 7, "month": 30}
+PAGE_SIZE = 1000
+# Full rebuild interval; corrects drift from points changed outside award()
+RELOAD_SECONDS = 60 * 60
+SNAPSHOT_KEY = "leaderboard:snapshot"
+SNAPSHOT_TTL_SECONDS = 5 * 60
+SNAPSHOT_KEEP_SECONDS = 24 * 3600
+AWARD_CHANNEL = "leaderboard_awards"
+# Background tick: window expiry, missing profiles, and the reload when due
+REFRESH_TICK_SECONDS = 60
+
+
+class RankedBoard:
+    """Scores with O(log n) rank lookup and O(k) top-k."""
+
+    def __init__(self):
+        self._scores = {}
+        # (-score, user_id) so index 0 is the leader
+        self._ranked = SortedList()
+
+    def add(self, user_id: str, delta: int):
+        if not delta:
+            return
+        old = self._scores.get(user_id)
+        if old is not None:
+            self._ranked.remove((-old, user_id))
+        new = (old or 0) + delta
+        if new:
+            self._scores[user_id] = new
+            self._ranked.add((-new, user_id))
+        else:
+            self._scores.pop(user_id, None)
+
+    def top(self, limit: int) -> list:
+        return [(user_id, -neg) for neg, user_id in self._ranked.islice(0, limit)]
+
+    def rank(self, user_id: str):
+        score = self._scores.get(user_id)
+        if score is None:
+            return None
+        # Users sharing a score share the best rank among them
+        return self._ranked.bisect_left((-score, "")) + 1, score
+
+    def __len__(self):
+        return len(self._ranked)
+
+
+class Leaderboard:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaded_at = None
+        # Last award event applied; replayed and relayed awards at or below it are skipped
+        self._applied_id = 0
+        self._all = RankedBoard()
+        self._windows = {name: RankedBoard() for name in WINDOW_DAYS}
+        # { date: { user_id: points } } covering the longest window
+        self._buckets = defaultdict(lambda: defaultdict(int))
+        self._expired = set()
+        self._profiles = {}
+        # Leaders seen without a profile; filled in by the next refresh tick
+        self._missing_profiles = set()
+
+    def _today(self):
+        return datetime.now(timezone.utc).date()
+
+    def _expire(self, today):
+        # Drop each day's points from a window as it slides out of it
+        for day in sorted(self._buckets):
+            age = (today - day).days
+            for name, days in WINDOW_DAYS.items():
+                if age >= days and (day, name) not in self._expired:
+                    for user_id, points in self._buckets[day].items():
+                        self._windows[name].add(user_id, -points)
+                    self._expired.add((day, name))
+            if age >= max(WINDOW_DAYS.values()):
+                del self._buckets[day]
+                self._expired = {key for key in self._expired if key[0] != day}
+
+    def _fetch_snapshot(self) -> dict:
+        # Taken first: awards logged during the read are replayed on top
+        event_id = last_model_event_id()
+        users = []
+        offset = 0
+        while True:
+            res = (
+                supabase.table("users")
+                .select("user_id, name, avatar, points")
+                .order("user_id")
+                .range(offset, offset + PAGE_SIZE - 1)
+                .execute()
+            )
+            rows = res.data or []
+            users.extend(rows)
+            if len(rows) < PAGE_SIZE:
+                break
+            offset += PAGE_SIZE
+
+        since = self._today() - timedelta(days=max(WINDOW_DAYS.values()) - 1)
+        points = []
+        last_id = 0
+        while True:
+            res = (
+                supabase.table("user_points")
+                .select("id, user_id, points, created_at")
+                .gte("created_at", since.isoformat())
+                .gt("id", last_id)
+                .order("id")
+                .limit(PAGE_SIZE)
+                .execute()
+            )
+            rows = res.data or []
+            points.extend(rows)
+            if len(rows) < PAGE_SIZE:
+                break
+            last_id = rows[-1]["id"]
+
+        return {"event_id": event_id, "users": users, "points": points}
+
+    def _snapshot(self) -> dict:
+        return get_or_load(SNAPSHOT_KEY, self._fetch_snapshot, SNAPSHOT_TTL_SECONDS, keep_last=SNAPSHOT_KEEP_SECONDS)
+
+    def warm(self):
+        """Fill the shared snapshot without building this process's boards."""
+        self._snapshot()
+
+    def _build(self, snapshot: dict, stale: bool = False):
+        """Build a fresh board off the lock, then swap it in and replay newer awards."""
+        fresh = Leaderboard()
+        for u in snapshot["users"]:
+            fresh._profiles[u["user_id"]] = {"name": u["name"], "avatar": u.get("avatar")}
+            fresh._all.add(u["user_id"], u.get("points") or 0)
+
+        today = self._today()
+        for p in snapshot["points"]:
+            # Timestamps come back in UTC, so the date prefix is the UTC day
+            day = date.fromisoformat(p["created_at"][:10])
+            fresh._add_windowed(p["user_id"], p["points"], day, today)
+
+        with self._lock:
+            self._all = fresh._all
+            self._windows = fresh._windows
+            self._buckets = fresh._buckets
+            self._expired = fresh._expired
+            self._profiles = fresh._profiles
+            self._missing_profiles = set()
+            self._applied_id = snapshot.get("event_id", 0)
+            for event_id, award in read_model_events(AWARD_CHANNEL, self._applied_id):
+                self._apply_award(event_id, award)
+            # A board built from the last good rows is due for a reload at once
+            self._loaded_at = time.monotonic() - (RELOAD_SECONDS if stale else 0)
+
+    def _load(self):
+        self._build(self._snapshot())
+
+    def _add_windowed(self, user_id: str, points: int, day, today):
+        self._buckets[day][user_id] += points
+        age = (today - day).days
+        for name, days in WINDOW_DAYS.items():
+            if age < days:
+                self._windows[name].add(user_id, points)
+            else:
+                # Already outside this window, so never subtract it later
+                self._expired.add((day, name))
+
+    def refresh(self):
+        """Reload when due, otherwise expire windows and fill missing profiles."""
+        if self._loaded_at is None:
+            last = last_loaded(SNAPSHOT_KEY)
+            if last is not None:
+                # Serve the last good board while the reload below runs
+                self._build(last, stale=True)
+        if self._loaded_at is None or time.monotonic() - self._loaded_at >= RELOAD_SECONDS:
+            self._load()
+
+        with self._lock:
+            self._expire(self._today())
+            missing = list(self._missing_profiles)
+        if missing:
+            self._fill_profiles(missing)
+
+    def _ensure_loaded(self):
+        if self._loaded_at is None:
+            raise BackendUnavailable("Leaderboard is still loading", retry_after=REFRESH_TICK_SECONDS)
+
+    def award(self, user_id: str, points: int):
+        """Add points in every worker's board."""
+        publish_model_event(AWARD_CHANNEL, [user_id, points, self._today().isoformat()])
+
+    def _apply_award(self, event_id: int, award: list):
+        # Caller holds the lock
+        if event_id <= self._applied_id:
+            return
+        user_id, points, day = award
+        self._all.add(user_id, points)
+        self._add_windowed(user_id, points, date.fromisoformat(day), self._today())
+        self._applied_id = event_id
+
+    def on_award(self, event_id: int, award: list):
+        with self._lock:
+            # Nothing to maintain until the first load builds the board
+            if self._loaded_at is None:
+                return
+            self._apply_award(event_id, award)
+
+    def _board(self, window: str) -> RankedBoard:
+        return self._all if window == "all" else self._windows[window]
+
+    def _fill_profiles(self, user_ids: list):
+        res = supabase.table("users").select("user_id, name, avatar").in_("user_id", user_ids).execute()
+        with self._lock:
+            for u in res.data or []:
+                self._profiles[u["user_id"]] = {"name": u["name"], "avatar": u.get("avatar")}
+            self._missing_profiles.difference_update(user_ids)
+
+    def top(self, window: str, limit: int) -> list:
+        with self._lock:
+            self._ensure_loaded()
+            entries = self._board(window).top(limit)
+            self._missing_profiles.update(uid for uid, _ in entries if uid not in self._profiles)
+
+            leaders = []
+            rank = 0
+            previous = None
+            for position, (user_id, points) in enumerate(entries, start=1):
+                if points != previous:
+                    rank = position
+                    previous = points
+                profile = self._profiles.get(user_id, {})
+                leaders.append({
+                    "rank": rank,
+                    "user_id": user_id,
+                    "name": profile.get("name"),
+                    "avatar": profile.get("avatar"),
+                    "points": points,
+                })
+            return leaders
+
+    def rank_of(self, window: str, user_id: str):
+        with self._lock:
+            self._ensure_loaded()
+            found = self._board(window).rank(user_id)
+            if found is None:
+                return None
+            rank, points = found
+            return {"rank": rank, "points": points}
+
+
+leaderboard = Leaderboard()
+on_model_event(AWARD_CHANNEL, leaderboard.on_award)
+leaderboard_refresh = PeriodicRefresh("Leaderboard", leaderboard.refresh, REFRESH_TICK_SECONDS)
@@ -0,0 +1,124 @@
+import asyncio
+from app.services.supabase_client import supabase
+
+# Follower notification fan-out.
+# Handlers only enqueue one event per report change; a background worker waits
+# a short coalescing window, then expands each report's pending event to its
+# followers with chunked bulk inserts into the notifications table.
+
+COALESCE_WINDOW_SECONDS = 2.0
+INSERT_CHUNK_SIZE = 500
+FOLLOWER_PAGE_SIZE = 1000
+
+# { report_id: {"event": str, "data": dict, "actors": set, "count": int} }
+_pending = {}
+_wakeup = None
+_worker_task = None
+
+
+def enqueue_report_notification(report_id: int, event: str, actor_id: str | None = None, data: dict | None = None):
+    """Queue a notification for every follower of report_id.
+
+    Successive events for the same report inside the coalescing window collapse
+    into a single notification carrying the latest event.
+    """
+    report_id = int(report_id)
+    entry = _pending.get(report_id)
+    if entry is None:
+        entry = {"event": event, "data": data or {}, "actors": set(), "count": 0}
+        _pending[report_id] = entry
+    else:
+        entry["event"] = event
+        entry["data"] = data or {}
+
+    entry["count"] += 1
+    if actor_id:
+        entry["actors"].add(str(actor_id))
+
+    if _wakeup is not None:
+        _wakeup.set()
+
+
+def _fetch_follower_ids(report_id: int) -> list:
+    follower_ids = []
+    last_id = 0
+    while True:
+        res = (
+            supabase.table("report_followers")
+            .select("id, user_id")
+            .eq("report_id", report_id)
+            .gt("id", last_id)
+            .order("id")
+            .limit(FOLLOWER_PAGE_SIZE)
+            .execute()
+        )
+        rows = res.data or []
+        follower_ids.extend(r["user_id"] for r in rows)
+        if len(rows) < FOLLOWER_PAGE_SIZE:
+            return follower_ids
+        last_id = rows[-1]["id"]
+
+
+def _fan_out(report_id: int, entry: dict):
+    # A follower who caused every coalesced change does not need to be told about it
+    skip = entry["actors"] if len(entry["actors"]) == 1 else set()
+    recipients = {uid for uid in _fetch_follower_ids(report_id) if uid not in skip}
+
+    rows = [
+        {
+            "user_id": uid,
+            "report_id": report_id,
+            "event": entry["event"],
+            "payload": {**entry["data"], "coalesced": entry["count"]},
+        }
+        for uid in recipients
+    ]
+
+    for start in range(0, len(rows), INSERT_CHUNK_SIZE):
+        supabase.table("notifications").insert(rows[start:start + INSERT_CHUNK_SIZE]).execute()
+
+
+async def _worker():
+    while True:
+        await _wakeup.wait()
+        await asyncio.sleep(COALESCE_WINDOW_SECONDS)
+        _wakeup.clear()
+        await _flush()
+
+
+async def _flush():
+    batch = dict(_pending)
+    _pending.clear()
+
+    for report_id, entry in batch.items():
+        try:
+            await asyncio.to_thread(_fan_out, report_id, entry)
+        except Exception as e:
+            print(f"Notification fan-out error for report {report_id}: {str(e)}")
+
+
+def start_notification_worker():
+    global _wakeup, _worker_task
+    if _worker_task is not None:
+        return
+
+    _wakeup = asyncio.Event()
+    if _pending:
+        _wakeup.set()
+    _worker_task = asyncio.create_task(_worker())
+
+
+async def stop_notification_worker():
+    global _worker_task
+    if _worker_task is None:
+        return
+
+    _worker_task.cancel()
+    try:
+        await _worker_task
+    except asyncio.CancelledError:
+        pass
+    _worker_task = None
+
+    # Deliver whatever was still waiting out its coalescing window
+    await _flush()
@@ -0,0 +1,195 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from cachetools import TTLCache
+from fastapi import Depends, HTTPException, Request
+from fastapi.responses import JSONResponse
+from app.services.shared_state import STATE_FILE
+
+# Admission control for write endpoints.
+# Per-route token buckets keyed by user id (or client IP before login), plus a
+# global cap on in-flight writes that sheds load with 503 once the wait queue
+# is full. Reads never touch either, so they keep their latency during bursts.
+
+# Set to a file path to share bucket state between workers on one host;
+# defaults to the (private) shared state file when running under gunicorn.conf.py
+SHARED_STATE_PATH = os.getenv("RATE_LIMIT_SHARED_PATH") or STATE_FILE
+
+MAX_CONCURRENT_WRITES = 16
+MAX_WRITE_QUEUE_DEPTH = 64
+WRITE_QUEUE_TIMEOUT_SECONDS = 5
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+# Every policy refills completely well within this, so older buckets can be dropped
+BUCKET_IDLE_SECONDS = 24 * 3600
+MAX_MEMORY_BUCKETS = 100000
+# Drop idle SQLite buckets on roughly one take in this many
+PURGE_EVERY_TAKES = 500
+
+
+@dataclass(frozen=True)
+class RatePolicy:
+    capacity: int
+    refill_per_second: float
+
+
+ROUTE_POLICIES = {
+    "report_create": RatePolicy(capacity=5, refill_per_second=5 / 3600),
+    "report_comment": RatePolicy(capacity=10, refill_per_second=30 / 3600),
+    "report_flag": RatePolicy(capacity=5, refill_per_second=20 / 3600),
+    "admin_login": RatePolicy(capacity=5, refill_per_second=5 / 900),
+}
+
+
+def _refill(tokens: float, updated: float, policy: RatePolicy, now: float):
+    tokens = min(policy.capacity, tokens + (now - updated) * policy.refill_per_second)
+    if tokens >= 1:
+        return tokens - 1, 0.0
+    return tokens, (1 - tokens) / policy.refill_per_second
+
+
+class MemoryBucketStore:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # { key: (tokens, updated_at) }; idle buckets are full again, so expiring them is safe
+        self._buckets = TTLCache(maxsize=MAX_MEMORY_BUCKETS, ttl=BUCKET_IDLE_SECONDS)
+
+    def take(self, key: str, policy: RatePolicy) -> float:
+        """Take one token; returns 0 when allowed, else seconds until one is available."""
+        now = time.time()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (policy.capacity, now))
+            tokens, wait_seconds = _refill(tokens, updated, policy, now)
+            self._buckets[key] = (tokens, now)
+            return wait_seconds
+
+
+class SqliteBucketStore:
+    """Bucket state in a local SQLite file so every worker sees the same counts."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._takes = 0
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tokens REAL, updated REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS buckets_updated ON buckets(updated)")
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=1, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def take(self, key: str, policy: RatePolicy) -> float:
+        now = time.time()
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tokens, updated FROM buckets WHERE key = ?", (key,)).fetchone()
+            tokens, updated = row if row else (policy.capacity, now)
+            tokens, wait_seconds = _refill(tokens, updated, policy, now)
+            conn.execute(
+                "INSERT OR REPLACE INTO buckets (key, tokens, updated) VALUES (?, ?, ?)",
+                (key, tokens, now),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        self._takes += 1
+        if self._takes % PURGE_EVERY_TAKES == 0:
+            # Idle buckets are full again, so dropping them changes no decision
+            conn.execute("DELETE FROM buckets WHERE updated < ?", (now - BUCKET_IDLE_SECONDS,))
+        return wait_seconds
+
+
+bucket_store = SqliteBucketStore(SHARED_STATE_PATH) if SHARED_STATE_PATH else MemoryBucketStore()
+
+
+def client_ip(request: Request) -> str:
+    # X-Forwarded-For is never read here: the server rewrites client.host from
+    # it only for trusted proxies (uvicorn --forwarded-allow-ips, or
+    # forwarded_allow_ips in gunicorn.conf.py), so clients cannot spoof it
+    return request.client.host if request.client else "unknown"
+
+
+def check_rate_limit(policy_name: str, key: str):
+    """Spend one token from key's bucket for the policy; 429 with Retry-After when empty."""
+    policy = ROUTE_POLICIES[policy_name]
+    try:
+        wait_seconds = bucket_store.take(f"{policy_name}:{key}", policy)
+    except Exception as e:
+        # Never turn a limiter fault into an outage
+        print(f"Rate limit store error: {str(e)}")
+        return
+
+    if wait_seconds > 0:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many requests, please slow down",
+            headers={"Retry-After": str(int(wait_seconds) + 1)},
+        )
+
+
+def rate_limit_user(policy_name: str):
+    # Imported here: the auth dependencies import the admin router, which uses rate_limit_ip
+    from app.dependencies.auth import get_current_user
+
+    async def dependency(user=Depends(get_current_user)):
+        check_rate_limit(policy_name, user.id)
+    return dependency
+
+
+def rate_limit_ip(policy_name: str):
+    async def dependency(request: Request):
+        check_rate_limit(policy_name, client_ip(request))
+    return dependency
+
+
+class WriteLoadShedMiddleware:
+    """Caps in-flight writes; rejects with 503 instead of queueing without bound."""
+
+    def __init__(self, app, max_concurrent: int = MAX_CONCURRENT_WRITES, max_queue: int = MAX_WRITE_QUEUE_DEPTH):
+        self.app = app
+        self.max_queue = max_queue
+        self._slots = asyncio.Semaphore(max_concurrent)
+        self._waiting = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in WRITE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        if self._waiting >= self.max_queue:
+            await self._shed(scope, receive, send)
+            return
+
+        self._waiting += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=WRITE_QUEUE_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            await self._shed(scope, receive, send)
+            return
+        finally:
+            self._waiting -= 1
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self._slots.release()
+
+    async def _shed(self, scope, receive, send):
+        response = JSONResponse(
+            status_code=503,
+            content={"detail": "Server is busy, please retry shortly"},
+            headers={"Retry-After": "2"},
+        )
+        await response(scope, receive, send)
@@ -0,0 +1,138 @@
+import threading
+from cachetools import TTLCache
+from pyroaring import BitMap
+from app.services.supabase_client import supabase, execute_read_async
+from app.services.shared_state import shared_state, shared_cache, get_or_load_async
+
+# Caches behind /report/list.
+# Everyone shares one anonymous report list; logged-in requests overlay
+# is_following from a small per-user set of followed report ids, so a
+# personalized list costs the same as an anonymous one.
+# Both live in the shared cache so all workers hit the same entries. Each
+# worker also keeps the list it last decoded, tagged with the shared version
+# counter, and only re-reads the cache when the version moves. A miss is
+# filled by one load across all workers. Follower and comment counts come from
+# the database counters and may lag by up to REPORT_LIST_TTL_SECONDS; only
+# changes to the listed reports themselves drop the list early.
+
+REPORT_LIST_TTL_SECONDS = 30
+FOLLOW_SET_TTL_SECONDS = 300
+FOLLOW_PAGE_SIZE = 1000
+
+REPORT_LIST_KEY = "report_list"
+REPORT_LIST_VERSION_KEY = "report_list:version"
+
+_lock = threading.Lock()
+# { version: [report, ...] }
+_local_list = TTLCache(maxsize=1, ttl=REPORT_LIST_TTL_SECONDS)
+
+
+async def _fetch_report_list() -> list:
+    # Not hedged: the full list is the heaviest read, and a duplicate would double it
+    result = await execute_read_async(
+        supabase.table("reports")
+        .select(
+            """
+            report_id,
+            title,
+            description,
+            status,
+            created_by,
+            closed_by,
+            location,
+            latitude,
+            longitude,
+            photo_url,
+            created_at,
+            updated_at,
+            category,
+            followers_count,
+            comments_count
+            """
+        )
+        .eq("moderation_status", "active")
+        .order("created_at", desc=True),
+        cache_key="report_list",
+    )
+
+    clean_reports = []
+
+    for r in result.data:
+        clean_reports.append(
+            {
+                "report_id": r["report_id"],
+                "title": r["title"],
+                "category": r["category"],
+                "description": r["description"],
+                "status": r["status"],
+                "created_by": r["created_by"],
+                "closed_by": r["closed_by"],
+                "location": r["location"],
+                "latitude": r.get("latitude"),
+                "longitude": r.get("longitude"),
+                "photo_url": r["photo_url"],
+                "created_at": r["created_at"],
+                "updated_at": r["updated_at"],
+                "is_following": False,
+                "followers_count": r.get("followers_count") or 0,
+                "comments_count": r.get("comments_count") or 0,
+            }
+        )
+
+    return clean_reports
+
+
+async def _fetch_follow_set(user_id: str) -> BitMap:
+    followed = BitMap()
+    offset = 0
+    while True:
+        res = await execute_read_async(
+            supabase.table("report_followers")
+            .select("report_id")
+            .eq("user_id", user_id)
+            .order("report_id")
+            .range(offset, offset + FOLLOW_PAGE_SIZE - 1)
+        )
+        rows = res.data or []
+        followed.update(r["report_id"] for r in rows)
+        if len(rows) < FOLLOW_PAGE_SIZE:
+            return followed
+        offset += FOLLOW_PAGE_SIZE
+
+
+def _follow_key(user_id: str) -> str:
+    return f"follow_set:{user_id}"
+
+
+async def get_report_list() -> list:
+    version = shared_state.get(REPORT_LIST_VERSION_KEY, 0)
+    with _lock:
+        reports = _local_list.get(version)
+    if reports is not None:
+        return reports
+
+    reports = await get_or_load_async(REPORT_LIST_KEY, _fetch_report_list, REPORT_LIST_TTL_SECONDS)
+    with _lock:
+        _local_list.clear()
+        _local_list[version] = reports
+    return reports
+
+
+async def get_follow_set(user_id: str) -> BitMap:
+    followed = shared_cache.get(_follow_key(user_id))
+    if followed is not None:
+        return BitMap(followed)
+
+    followed = await _fetch_follow_set(user_id)
+    shared_cache.set(_follow_key(user_id), list(followed), FOLLOW_SET_TTL_SECONDS)
+    return followed
+
+
+def invalidate_report_list():
+    shared_cache.delete(REPORT_LIST_KEY)
+    shared_state.incr(REPORT_LIST_VERSION_KEY)
+
+
+def invalidate_follow_set(user_id: str):
+    """Drop a user's follow set after they follow or unfollow; the next read reloads it."""
+    shared_cache.delete(_follow_key(user_id))
@@ -0,0 +1,133 @@
+import csv
+import io
+from datetime import datetime
+from app.services.supabase_client import supabase, execute_read
+
+# Streaming admin export of the reports table.
+# Pages through reports by report_id (keyset) and emits each page as soon as
+# it arrives, so memory use stays flat however large the history is.
+
+EXPORT_PAGE_SIZE = 1000
+
+EXPORT_COLUMNS = [
+    "report_id",
+    "title",
+    "description",
+    "category",
+    "status",
+    "moderation_status",
+    "created_by",
+    "closed_by",
+    "location",
+    "latitude",
+    "longitude",
+    "photo_url",
+    "is_anonymous",
+    "created_at",
+    "updated_at",
+]
+
+
+def iter_report_pages(created_from: datetime | None = None, created_to: datetime | None = None):
+    last_id = 0
+    while True:
+        query = (
+            supabase.table("reports")
+            .select(", ".join(EXPORT_COLUMNS))
+            .gt("report_id", last_id)
+        )
+        if created_from is not None:
+            query = query.gte("created_at", created_from.isoformat())
+        if created_to is not None:
+            query = query.lt("created_at", created_to.isoformat())
+
+        rows = execute_read(query.order("report_id").limit(EXPORT_PAGE_SIZE)).data or []
+        if rows:
+            yield rows
+        if len(rows) < EXPORT_PAGE_SIZE:
+            return
+        last_id = rows[-1]["report_id"]
+
+
+def stream_csv(pages):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS, extrasaction="ignore")
+    writer.writeheader()
+
+    for rows in pages:
+        writer.writerows(rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+
+    # Header only when there were no rows
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands back whatever the Parquet writer has produced so far."""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def stream_parquet(pages):
+    # Imported lazily: only the export path needs pyarrow
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ("report_id", pa.int64()),
+        ("title", pa.string()),
+        ("description", pa.string()),
+        ("category", pa.string()),
+        ("status", pa.string()),
+        ("moderation_status", pa.string()),
+        ("created_by", pa.string()),
+        ("closed_by", pa.string()),
+        ("location", pa.string()),
+        ("latitude", pa.float64()),
+        ("longitude", pa.float64()),
+        ("photo_url", pa.string()),
+        ("is_anonymous", pa.bool_()),
+        ("created_at", pa.timestamp("us", tz="UTC")),
+        ("updated_at", pa.timestamp("us", tz="UTC")),
+    ])
+    timestamp_columns = {"created_at", "updated_at"}
+
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression="snappy")
+    try:
+        for rows in pages:
+            arrays = []
+            for field in schema:
+                values = [r.get(field.name) for r in rows]
+                if field.name in timestamp_columns:
+                    arrays.append(pa.array(values, pa.string()).cast(field.type))
+                else:
+                    arrays.append(pa.array(values, field.type))
+            # One row group per page
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            yield sink.drain()
+    finally:
+        writer.close()
+
+    yield sink.drain()
@@ -0,0 +1,244 @@
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+import httpx
+from postgrest import APIError
+from supabase_auth.errors import AuthRetryableError
+
+# Deadlines, retries, hedging and circuit breaking for backend calls.
+# Only transient failures (transport errors, timeouts, 5xx) count against the
+# breaker or get retried; request errors such as constraint violations pass
+# straight through to the caller.
+# call() blocks its thread and is for code already off the event loop;
+# request handlers use call_async(), which waits and backs off without
+# blocking the loop.
+
+_pool = ThreadPoolExecutor(max_workers=32, thread_name_prefix="backend-call")
+
+
+class BackendUnavailable(Exception):
+    def __init__(self, message: str = "Service temporarily unavailable", retry_after: int = 5):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class DeadlineExceeded(Exception):
+    pass
+
+
+def is_transient(exc: Exception) -> bool:
+    # supabase-auth raises AuthRetryableError for 502/503/504 and transport failures
+    if isinstance(exc, (httpx.TransportError, DeadlineExceeded, AuthRetryableError)):
+        return True
+    if isinstance(exc, APIError):
+        # PostgREST reports gateway failures with the HTTP status as the code
+        return str(exc.code or "").startswith("5")
+    return False
+
+
+class CircuitBreaker:
+    """Opens when the recent failure rate spikes; lets one probe through after a cooldown."""
+
+    def __init__(self, window_seconds: float = 30, min_calls: int = 10, failure_ratio: float = 0.5, open_seconds: float = 15):
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.failure_ratio = failure_ratio
+        self.open_seconds = open_seconds
+        self._lock = threading.Lock()
+        # (timestamp, ok)
+        self._outcomes = deque()
+        self._opened_at = None
+        self._probing = False
+
+    def _trim(self, now: float):
+        while self._outcomes and now - self._outcomes[0][0] > self.window_seconds:
+            self._outcomes.popleft()
+
+    @property
+    def is_open(self) -> bool:
+        with self._lock:
+            return self._opened_at is not None and time.monotonic() - self._opened_at < self.open_seconds
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.open_seconds or self._probing:
+                return False
+            # Half-open: a single probe decides whether to close again
+            self._probing = True
+            return True
+
+    def release(self):
+        """Give up a half-open probe that ended without an outcome (e.g. cancelled)."""
+        with self._lock:
+            self._probing = False
+
+    def record(self, ok: bool):
+        now = time.monotonic()
+        with self._lock:
+            if self._opened_at is not None:
+                self._probing = False
+                if ok:
+                    self._opened_at = None
+                    self._outcomes.clear()
+                else:
+                    self._opened_at = now
+                return
+
+            self._outcomes.append((now, ok))
+            self._trim(now)
+            failures = sum(1 for _, outcome in self._outcomes if not outcome)
+            if len(self._outcomes) >= self.min_calls and failures / len(self._outcomes) >= self.failure_ratio:
+                self._opened_at = now
+                print(f"Circuit breaker opened: {failures}/{len(self._outcomes)} recent calls failed")
+
+    def retry_after(self) -> int:
+        with self._lock:
+            if self._opened_at is None:
+                return 1
+            return max(1, int(self.open_seconds - (time.monotonic() - self._opened_at)) + 1)
+
+
+def _with_deadline(fn, deadline: float, hedge_after: float | None = None):
+    """Run fn on the pool, optionally racing a duplicate once hedge_after passes."""
+    started = time.monotonic()
+    pending = {_pool.submit(fn)}
+
+    if hedge_after is not None and hedge_after < deadline:
+        done, pending = wait(pending, timeout=hedge_after)
+        if done:
+            future = done.pop()
+            if future.exception() is None:
+                return future.result()
+            if not is_transient(future.exception()):
+                raise future.exception()
+        # Slow (or transiently failed) first attempt: send a duplicate read
+        pending.add(_pool.submit(fn))
+
+    last_error = None
+    while pending:
+        remaining = deadline - (time.monotonic() - started)
+        if remaining <= 0:
+            break
+        done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                return future.result()
+            last_error = future.exception()
+            if not is_transient(last_error):
+                raise last_error
+
+    if last_error is not None and not pending:
+        raise last_error
+    raise DeadlineExceeded(f"Backend call exceeded {deadline}s deadline")
+
+
+async def _with_deadline_async(fn, deadline: float, hedge_after: float | None = None):
+    """_with_deadline for the event loop: waits on the pool futures without blocking it."""
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    pending = {asyncio.wrap_future(_pool.submit(fn))}
+    try:
+        if hedge_after is not None and hedge_after < deadline:
+            done, pending = await asyncio.wait(pending, timeout=hedge_after)
+            if done:
+                future = done.pop()
+                if future.exception() is None:
+                    return future.result()
+                if not is_transient(future.exception()):
+                    raise future.exception()
+            # Slow (or transiently failed) first attempt: send a duplicate read
+            pending.add(asyncio.wrap_future(_pool.submit(fn)))
+
+        last_error = None
+        while pending:
+            remaining = deadline - (loop.time() - started)
+            if remaining <= 0:
+                break
+            done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+                last_error = future.exception()
+                if not is_transient(last_error):
+                    raise last_error
+
+        if last_error is not None and not pending:
+            raise last_error
+        raise DeadlineExceeded(f"Backend call exceeded {deadline}s deadline")
+    finally:
+        # Abandoned attempts finish on their own (the HTTP timeout bounds them)
+        for future in pending:
+            future.cancel()
+
+
+def _retry_or_raise(e: Exception, breaker: CircuitBreaker, attempt: int, retries: int):
+    """Record a failed attempt; raises unless it should be retried."""
+    if not is_transient(e):
+        # The backend answered; the request itself was bad
+        breaker.record(True)
+        raise e
+    breaker.record(False)
+    print(f"Backend call failed (attempt {attempt + 1}): {str(e)}")
+    if attempt >= retries:
+        raise BackendUnavailable(retry_after=breaker.retry_after()) from e
+
+
+def _backoff_delay(backoff: float, attempt: int) -> float:
+    # Full jitter exponential backoff
+    return random.uniform(0, backoff * (2 ** attempt))
+
+
+def call(fn, breaker: CircuitBreaker, *, deadline: float, retries: int = 0, hedge_after: float | None = None, backoff: float = 0.1):
+    """Call fn under breaker with a per-attempt deadline and jittered retries.
+
+    Transient failures that exhaust their retries surface as BackendUnavailable.
+    """
+    attempt = 0
+    while True:
+        if not breaker.allow():
+            raise BackendUnavailable(retry_after=breaker.retry_after())
+
+        try:
+            result = _with_deadline(fn, deadline, hedge_after)
+        except Exception as e:
+            _retry_or_raise(e, breaker, attempt, retries)
+            attempt += 1
+            time.sleep(_backoff_delay(backoff, attempt))
+            continue
+        except BaseException:
+            # Cancelled or interrupted: no outcome to record, but a probe must
+            # not keep the breaker half-open forever
+            breaker.release()
+            raise
+
+        breaker.record(True)
+        return result
+
+
+async def call_async(fn, breaker: CircuitBreaker, *, deadline: float, retries: int = 0, hedge_after: float | None = None, backoff: float = 0.1):
+    """call() for request handlers: fn still runs on the pool, but every wait is awaited."""
+    attempt = 0
+    while True:
+        if not breaker.allow():
+            raise BackendUnavailable(retry_after=breaker.retry_after())
+
+        try:
+            result = await _with_deadline_async(fn, deadline, hedge_after)
+        except Exception as e:
+            _retry_or_raise(e, breaker, attempt, retries)
+            attempt += 1
+            await asyncio.sleep(_backoff_delay(backoff, attempt))
+            continue
+        except BaseException:
+            # Cancelled or interrupted: no outcome to record, but a probe must
+            # not keep the breaker half-open forever
+            breaker.release()
+            raise
+
+        breaker.record(True)
+        return result
@@ -0,0 +1,374 @@
+import asyncio
+import json
+import os
+import sqlite3
+import stat
+import threading
+import time
+from collections import OrderedDict
+
+# Key-value layer shared by the worker processes on one host.
+# With SHARED_STATE_DIR set (gunicorn.conf.py sets it) every worker reads and
+# writes the same SQLite file in that directory; without it, the same API is
+# served from process memory for single-process development runs.
+#
+# Three stores, so short-lived cache traffic can never push out records:
+#   shared_state   durable records (admin sessions, idempotency, claims, counters)
+#   shared_cache   evictable caches with a size bound
+#   shared_events  the live-event log that SSE relays tail
+#
+# Values are JSON, never pickle: the file must not be able to run code in a
+# worker. The directory must be private (0700, ours) and the file 0600, or the
+# workers refuse to start.
+
+SHARED_STATE_DIR = os.getenv("SHARED_STATE_DIR")
+STATE_FILE_NAME = "state.db"
+
+RECORD_MAX_KEYS = 200000
+CACHE_MAX_KEYS = 50000
+# Long enough to replay every event newer than a read model's shared snapshot
+EVENT_RETENTION_SECONDS = 15 * 60
+# Sweep expired rows (and trim over-size caches) on roughly one write in this many
+PURGE_EVERY_WRITES = 500
+
+# A loader that holds its claim longer than this is presumed dead
+LOAD_CLAIM_SECONDS = 120
+LOAD_POLL_SECONDS = 0.1
+
+# { key: asyncio.Lock } so concurrent misses in one worker share one load
+_async_loads = {}
+
+
+def _encode(value) -> str:
+    return json.dumps(value, separators=(",", ":"))
+
+
+def _decode(raw: str):
+    return json.loads(raw)
+
+
+def _private_dir(path: str) -> str:
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    info = os.lstat(path)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o077:
+        raise RuntimeError(
+            f"Shared state directory {path} must be a directory owned by this user with mode 0700"
+        )
+    return path
+
+
+def _private_file(path: str) -> str:
+    fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_NOFOLLOW, 0o600)
+    try:
+        info = os.fstat(fd)
+    finally:
+        os.close(fd)
+    if info.st_uid != os.getuid() or info.st_mode & 0o077:
+        raise RuntimeError(f"Shared state file {path} must be owned by this user with mode 0600")
+    return path
+
+
+class LocalState:
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        # { key: (encoded value, expires_at or None) }, least recently used first
+        self._data = OrderedDict()
+
+    def _live(self, key: str, now: float):
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        if entry[1] is not None and entry[1] <= now:
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return entry
+
+    def _store(self, key: str, value, ttl: float | None, now: float):
+        self._data[key] = (_encode(value), now + ttl if ttl else None)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_keys:
+            self._data.popitem(last=False)
+
+    def get(self, key: str, default=None):
+        with self._lock:
+            entry = self._live(key, time.time())
+            return _decode(entry[0]) if entry else default
+
+    def set(self, key: str, value, ttl: float | None = None):
+        with self._lock:
+            self._store(key, value, ttl, time.time())
+
+    def add(self, key: str, value, ttl: float | None = None) -> bool:
+        """Set key only if it is absent; True when this call set it."""
+        now = time.time()
+        with self._lock:
+            if self._live(key, now):
+                return False
+            self._store(key, value, ttl, now)
+            return True
+
+    def delete(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def incr(self, key: str, delta: int = 1) -> int:
+        now = time.time()
+        with self._lock:
+            entry = self._live(key, now)
+            value = (_decode(entry[0]) if entry else 0) + delta
+            self._store(key, value, None, now)
+            return value
+
+
+class LocalEventLog:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._events = []
+        self._event_id = 0
+
+    def append_event(self, channel: str, payload) -> int:
+        now = time.time()
+        with self._lock:
+            self._event_id += 1
+            self._events.append((self._event_id, now, channel, json.dumps(payload, default=str)))
+            while self._events and self._events[0][1] < now - EVENT_RETENTION_SECONDS:
+                self._events.pop(0)
+            return self._event_id
+
+    def read_events(self, after_id: int, channel: str | None = None) -> list:
+        with self._lock:
+            return [
+                (eid, event_channel, _decode(raw))
+                for eid, _, event_channel, raw in self._events
+                if eid > after_id and channel in (None, event_channel)
+            ]
+
+    def last_event_id(self) -> int:
+        with self._lock:
+            return self._event_id
+
+
+class _SqliteFile:
+    """Per-thread, per-process connections to the shared state file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._writes = 0
+
+    def conn(self):
+        conn = getattr(self._local, "conn", None)
+        # Never reuse a connection across fork
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def purge_due(self) -> bool:
+        self._writes += 1
+        return self._writes % PURGE_EVERY_WRITES == 0
+
+
+class SqliteState:
+    def __init__(self, db: _SqliteFile, table: str, max_keys: int):
+        self.db = db
+        self.table = table
+        self.max_keys = max_keys
+        db.conn().execute(
+            f"CREATE TABLE IF NOT EXISTS {table} (key TEXT PRIMARY KEY, value TEXT, expires_at REAL, stored_at REAL)"
+        )
+        db.conn().execute(f"CREATE INDEX IF NOT EXISTS {table}_stored_at ON {table}(stored_at)")
+
+    def _maybe_purge(self, conn, now: float):
+        if not self.db.purge_due():
+            return
+        conn.execute(f"DELETE FROM {self.table} WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,))
+        # Over the bound: drop the oldest writes
+        conn.execute(
+            f"DELETE FROM {self.table} WHERE key IN ("
+            f"SELECT key FROM {self.table} ORDER BY stored_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_keys,),
+        )
+
+    def get(self, key: str, default=None):
+        row = self.db.conn().execute(
+            f"SELECT value FROM {self.table} WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (key, time.time()),
+        ).fetchone()
+        return _decode(row[0]) if row else default
+
+    def set(self, key: str, value, ttl: float | None = None):
+        now = time.time()
+        conn = self.db.conn()
+        conn.execute(
+            f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at, stored_at) VALUES (?, ?, ?, ?)",
+            (key, _encode(value), now + ttl if ttl else None, now),
+        )
+        self._maybe_purge(conn, now)
+
+    def add(self, key: str, value, ttl: float | None = None) -> bool:
+        """Set key only if it is absent; True when this call set it."""
+        now = time.time()
+        conn = self.db.conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                f"DELETE FROM {self.table} WHERE key = ? AND expires_at IS NOT NULL AND expires_at <= ?",
+                (key, now),
+            )
+            cursor = conn.execute(
+                f"INSERT OR IGNORE INTO {self.table} (key, value, expires_at, stored_at) VALUES (?, ?, ?, ?)",
+                (key, _encode(value), now + ttl if ttl else None, now),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return cursor.rowcount == 1
+
+    def delete(self, key: str):
+        self.db.conn().execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+
+    def incr(self, key: str, delta: int = 1) -> int:
+        now = time.time()
+        conn = self.db.conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(f"SELECT value FROM {self.table} WHERE key = ?", (key,)).fetchone()
+            value = (_decode(row[0]) if row else 0) + delta
+            conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at, stored_at) VALUES (?, ?, NULL, ?)",
+                (key, _encode(value), now),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return value
+
+
+class SqliteEventLog:
+    def __init__(self, db: _SqliteFile):
+        self.db = db
+        db.conn().execute(
+            "CREATE TABLE IF NOT EXISTS events (id INTEGER PRIMARY KEY AUTOINCREMENT, created_at REAL, channel TEXT, payload TEXT)"
+        )
+
+    def append_event(self, channel: str, payload) -> int:
+        now = time.time()
+        conn = self.db.conn()
+        cursor = conn.execute(
+            "INSERT INTO events (created_at, channel, payload) VALUES (?, ?, ?)",
+            (now, channel, json.dumps(payload, default=str)),
+        )
+        if self.db.purge_due():
+            conn.execute("DELETE FROM events WHERE created_at < ?", (now - EVENT_RETENTION_SECONDS,))
+        return cursor.lastrowid
+
+    def read_events(self, after_id: int, channel: str | None = None) -> list:
+        rows = self.db.conn().execute(
+            "SELECT id, channel, payload FROM events WHERE id > ? AND (? IS NULL OR channel = ?) ORDER BY id",
+            (after_id, channel, channel),
+        ).fetchall()
+        return [(eid, event_channel, _decode(payload)) for eid, event_channel, payload in rows]
+
+    def last_event_id(self) -> int:
+        row = self.db.conn().execute("SELECT MAX(id) FROM events").fetchone()
+        return row[0] or 0
+
+
+def last_loaded(key: str):
+    """The last value get_or_load(key, ..., keep_last=...) loaded, however old; None if none."""
+    return shared_cache.get(key + ":last")
+
+
+def get_or_load(key: str, loader, ttl: float, keep_last: float | None = None, wait: bool = True):
+    """Return the cached value for key, running loader() in one process to fill it on a miss.
+
+    Other processes that miss at the same time wait for that load instead of
+    repeating it; a loader that dies lets the next caller take over. With
+    wait=False a caller that finds the load claimed runs loader() itself
+    rather than polling, for cheap loads on a request path. With keep_last,
+    the loaded value is also kept that long for last_loaded(), so a fresh
+    process can start from it after the value itself has expired.
+    """
+    value = shared_cache.get(key)
+    if value is not None:
+        return value
+
+    claim = key + ":loading"
+    waited_until = time.monotonic() + LOAD_CLAIM_SECONDS
+    claimed = shared_state.add(claim, os.getpid(), LOAD_CLAIM_SECONDS)
+    while wait and not claimed and time.monotonic() < waited_until:
+        time.sleep(LOAD_POLL_SECONDS)
+        value = shared_cache.get(key)
+        if value is not None:
+            return value
+        claimed = shared_state.add(claim, os.getpid(), LOAD_CLAIM_SECONDS)
+
+    try:
+        value = loader()
+        shared_cache.set(key, value, ttl)
+        if keep_last:
+            shared_cache.set(key + ":last", value, keep_last)
+    finally:
+        if claimed:
+            shared_state.delete(claim)
+    return value
+
+
+async def get_or_load_async(key: str, loader, ttl: float):
+    """get_or_load for request handlers: loader is a coroutine function, and
+    every wait is awaited rather than slept.
+
+    Misses in this worker queue on one lock; misses in other workers wait on
+    the shared claim, so one miss costs one load across the host. Meant for a
+    few fixed keys, since each key keeps its lock.
+    """
+    value = shared_cache.get(key)
+    if value is not None:
+        return value
+
+    lock = _async_loads.setdefault(key, asyncio.Lock())
+    async with lock:
+        value = shared_cache.get(key)
+        if value is not None:
+            return value
+
+        claim = key + ":loading"
+        waited_until = time.monotonic() + LOAD_CLAIM_SECONDS
+        claimed = shared_state.add(claim, os.getpid(), LOAD_CLAIM_SECONDS)
+        while not claimed and time.monotonic() < waited_until:
+            await asyncio.sleep(LOAD_POLL_SECONDS)
+            value = shared_cache.get(key)
+            if value is not None:
+                return value
+            claimed = shared_state.add(claim, os.getpid(), LOAD_CLAIM_SECONDS)
+
+        try:
+            value = await loader()
+            shared_cache.set(key, value, ttl)
+        finally:
+            if claimed:
+                shared_state.delete(claim)
+        return value
+
+
+is_shared = bool(SHARED_STATE_DIR)
+
+if is_shared:
+    STATE_FILE = _private_file(os.path.join(_private_dir(SHARED_STATE_DIR), STATE_FILE_NAME))
+    _db = _SqliteFile(STATE_FILE)
+    shared_state = SqliteState(_db, "records", RECORD_MAX_KEYS)
+    shared_cache = SqliteState(_db, "cache", CACHE_MAX_KEYS)
+    shared_events = SqliteEventLog(_db)
+else:
+    STATE_FILE = None
+    shared_state = LocalState(RECORD_MAX_KEYS)
+    shared_cache = LocalState(CACHE_MAX_KEYS)
+    shared_events = LocalEventLog()
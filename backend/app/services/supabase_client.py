@@ -1,10 +1,107 @@
 import os
+import threading
+import httpx
+from cachetools import LRUCache
 from dotenv import load_dotenv
 
 load_dotenv()
-from supabase import create_client, Client
+from supabase import create_client, Client, ClientOptions
+from app.services.resilience import CircuitBreaker, BackendUnavailable, call, call_async
+
+READ_DEADLINE_SECONDS = 8
+WRITE_DEADLINE_SECONDS = 10
+READ_RETRIES = 2
+# Only small keyed reads are hedged; full-table reads routinely take longer than this
+HEDGE_AFTER_SECONDS = 0.25
+
+# Fail fast instead of hanging a worker on a degraded backend. The HTTP
+# timeout stays within the read deadline, so a call abandoned at its deadline
+# frees its pool thread shortly after instead of holding it.
+POSTGREST_TIMEOUT = httpx.Timeout(READ_DEADLINE_SECONDS, connect=3.0)
+STORAGE_TIMEOUT = 30
 
 supabase: Client = create_client(
     os.getenv("SUPABASE_URL"),
-    os.getenv("SUPABASE_KEY")  
+    os.getenv("SUPABASE_KEY"),
+    options=ClientOptions(
+        postgrest_client_timeout=POSTGREST_TIMEOUT,
+        storage_client_timeout=STORAGE_TIMEOUT,
+    ),
 )
+
+breaker = CircuitBreaker()
+
+# Last good result for keyed reads, served while the backend is unavailable
+_fallback_lock = threading.Lock()
+_fallback = LRUCache(maxsize=512)
+
+
+def _callable(query):
+    return query.execute if hasattr(query, "execute") else query
+
+
+def _remember(cache_key: str | None, result):
+    if cache_key is not None:
+        with _fallback_lock:
+            _fallback[cache_key] = result
+    return result
+
+
+def _stale(cache_key: str | None):
+    if cache_key is not None:
+        with _fallback_lock:
+            if cache_key in _fallback:
+                print(f"Serving stale data for {cache_key}")
+                return True, _fallback[cache_key]
+    return False, None
+
+
+def _read_options(hedge: bool) -> dict:
+    return {
+        "deadline": READ_DEADLINE_SECONDS,
+        "retries": READ_RETRIES,
+        "hedge_after": HEDGE_AFTER_SECONDS if hedge else None,
+    }
+
+
+def execute_read(query, cache_key: str | None = None, hedge: bool = False):
+    """Execute an idempotent read with retries and, optionally, a hedged duplicate.
+
+    Blocks the calling thread; use it only off the event loop (background
+    refreshes, exports, to_thread helpers). query is a query builder or a
+    zero-argument callable. With a cache_key the last successful result is
+    served when the backend is unavailable.
+    """
+    try:
+        result = call(_callable(query), breaker, **_read_options(hedge))
+    except BackendUnavailable:
+        found, stale = _stale(cache_key)
+        if found:
+            return stale
+        raise
+    return _remember(cache_key, result)
+
+
+async def execute_read_async(query, cache_key: str | None = None, hedge: bool = False):
+    """execute_read for request handlers; never blocks the event loop."""
+    try:
+        result = await call_async(_callable(query), breaker, **_read_options(hedge))
+    except BackendUnavailable:
+        found, stale = _stale(cache_key)
+        if found:
+            return stale
+        raise
+    return _remember(cache_key, result)
+
+
+def execute_write(query, deadline: float = WRITE_DEADLINE_SECONDS):
+    """Execute a write once under the breaker and a deadline; writes are never retried.
+
+    Storage uploads pass deadline=STORAGE_TIMEOUT to match their HTTP timeout.
+    """
+    return call(_callable(query), breaker, deadline=deadline)
+
+
+async def execute_write_async(query, deadline: float = WRITE_DEADLINE_SECONDS):
+    """execute_write for request handlers; never blocks the event loop."""
+    return await call_async(_callable(query), breaker, deadline=deadline)
@@ -0,0 +1,174 @@
+import math
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from sortedcontainers import SortedList
+from app.services.supabase_client import supabase, execute_read
+from app.services.shared_state import get_or_load, last_loaded
+from app.services.background import PeriodicRefresh
+from app.services.resilience import BackendUnavailable
+from app.services.event_bus import on_model_event, publish_model_event, read_model_events, last_model_event_id
+from app.utils.timestamps import parse_timestamp
+
+# Trending reports by time-decayed engagement.
+# Scores use forward decay: each event adds weight * e^(lambda * (t - epoch)),
+# so relative order never changes as time passes and only the touched report
+# is re-ranked. The decayed value is recovered by scaling by e^(-lambda * (now - epoch)).
+# Rebuilds run in a background task; the feed only ever reads the ranking.
+# Engagement goes through the shared event log and is applied by every
+# worker; a rebuild replays the events logged since its snapshot was read,
+# and a recycled worker starts from the last good snapshot while it rebuilds.
+
+HALF_LIFE_HOURS = 24
+DECAY_PER_SECOND = math.log(2) / (HALF_LIFE_HOURS * 3600)
+EVENT_WEIGHTS = {"follow": 3.0, "comment": 2.0, "confirmation": 4.0}
+MAX_TRACKED_REPORTS = 2000
+BACKFILL_DAYS = 7
+PAGE_SIZE = 1000
+# Rebuild from the database this often; drops engagement that was since undone
+REBUILD_SECONDS = 30 * 60
+REFRESH_TICK_SECONDS = 60
+# Raw events are shared between workers for this long, so a rebuild wave
+# after a restart reads the tables once
+SNAPSHOT_KEY = "trending:snapshot"
+SNAPSHOT_TTL_SECONDS = 5 * 60
+SNAPSHOT_KEEP_SECONDS = 24 * 3600
+ENGAGEMENT_CHANNEL = "trending_engagement"
+# Rebase the epoch before e^(lambda * age) can overflow a float
+MAX_EXPONENT = 600
+
+
+class TrendingReports:
+    def __init__(self, capacity: int = MAX_TRACKED_REPORTS):
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._built_at = None
+        # Last engagement event applied; replayed and relayed events at or below it are skipped
+        self._applied_id = 0
+        self._epoch = time.time()
+        self._scores = {}
+        # (-score, report_id): index 0 is the hottest
+        self._ranked = SortedList()
+
+    def _weight(self, event: str, at: float) -> float:
+        exponent = DECAY_PER_SECOND * (at - self._epoch)
+        if exponent > MAX_EXPONENT:
+            self._rebase(at)
+            exponent = 0.0
+        return EVENT_WEIGHTS.get(event, 1.0) * math.exp(exponent)
+
+    def _rebase(self, at: float):
+        factor = math.exp(-DECAY_PER_SECOND * (at - self._epoch))
+        self._epoch = at
+        self._scores = {rid: score * factor for rid, score in self._scores.items()}
+        self._ranked = SortedList((-score, rid) for rid, score in self._scores.items())
+
+    def _add(self, report_id: int, event: str, at: float):
+        old = self._scores.get(report_id)
+        if old is not None:
+            self._ranked.remove((-old, report_id))
+        new = (old or 0.0) + self._weight(event, at)
+        self._scores[report_id] = new
+        self._ranked.add((-new, report_id))
+
+        # Bounded: forget the coldest report once over capacity
+        if len(self._ranked) > self.capacity:
+            _, coldest = self._ranked.pop()
+            del self._scores[coldest]
+
+    def record(self, report_id: int, event: str):
+        """Count engagement in every worker's ranking."""
+        publish_model_event(ENGAGEMENT_CHANNEL, [int(report_id), event, time.time()])
+
+    def _apply(self, event_id: int, engagement: list):
+        # Caller holds the lock
+        if event_id <= self._applied_id:
+            return
+        report_id, event, at = engagement
+        self._add(report_id, event, at)
+        self._applied_id = event_id
+
+    def on_engagement(self, event_id: int, engagement: list):
+        with self._lock:
+            if self._built_at is None:
+                return
+            self._apply(event_id, engagement)
+
+    def _fetch_events(self, table: str, column: str, event: str, since: datetime) -> list:
+        events = []
+        last_id = 0
+        while True:
+            res = execute_read(
+                supabase.table(table)
+                .select(f"id, report_id, {column}")
+                .gte(column, since.isoformat())
+                .gt("id", last_id)
+                .order("id")
+                .limit(PAGE_SIZE)
+            )
+            rows = res.data or []
+            for r in rows:
+                if r.get("report_id") and r.get(column):
+                    events.append((r["report_id"], event, parse_timestamp(r[column]).timestamp()))
+            if len(rows) < PAGE_SIZE:
+                return events
+            last_id = rows[-1]["id"]
+
+    def _fetch_snapshot(self) -> dict:
+        # Taken first: engagement logged during the read is replayed on top
+        event_id = last_model_event_id()
+        since = datetime.now(timezone.utc) - timedelta(days=BACKFILL_DAYS)
+        events = (
+            self._fetch_events("report_followers", "followed_at", "follow", since)
+            + self._fetch_events("comments", "created_at", "comment", since)
+            + self._fetch_events("community_confirmations", "confirmed_at", "confirmation", since)
+        )
+        return {"event_id": event_id, "since": since.timestamp(), "events": events}
+
+    def _snapshot(self) -> dict:
+        return get_or_load(SNAPSHOT_KEY, self._fetch_snapshot, SNAPSHOT_TTL_SECONDS, keep_last=SNAPSHOT_KEEP_SECONDS)
+
+    def warm(self):
+        """Fill the shared snapshot without building this process's ranking."""
+        self._snapshot()
+
+    def _build(self, snapshot: dict, stale: bool = False):
+        fresh = TrendingReports(self.capacity)
+        fresh._epoch = snapshot["since"]
+        for report_id, event, at in sorted(snapshot["events"], key=lambda e: e[2]):
+            fresh._add(report_id, event, at)
+
+        with self._lock:
+            self._epoch = fresh._epoch
+            self._scores = fresh._scores
+            self._ranked = fresh._ranked
+            self._applied_id = snapshot["event_id"]
+            for event_id, engagement in read_model_events(ENGAGEMENT_CHANNEL, self._applied_id):
+                self._apply(event_id, engagement)
+            # A ranking built from the last good snapshot is due for a rebuild at once
+            self._built_at = time.monotonic() - (REBUILD_SECONDS if stale else 0)
+
+    def rebuild(self):
+        self._build(self._snapshot())
+
+    def refresh(self):
+        if self._built_at is None:
+            last = last_loaded(SNAPSHOT_KEY)
+            if last is not None:
+                # Serve the last good ranking while the rebuild below runs
+                self._build(last, stale=True)
+        if self._built_at is None or time.monotonic() - self._built_at >= REBUILD_SECONDS:
+            self.rebuild()
+
+    def top(self, limit: int) -> list:
+        """[(report_id, decayed_score)] hottest first."""
+        with self._lock:
+            if self._built_at is None:
+                raise BackendUnavailable("Trending reports are still loading", retry_after=REFRESH_TICK_SECONDS)
+            scale = math.exp(-DECAY_PER_SECOND * (time.time() - self._epoch))
+            return [(rid, -neg * scale) for neg, rid in self._ranked.islice(0, limit)]
+
+
+trending_reports = TrendingReports()
+on_model_event(ENGAGEMENT_CHANNEL, trending_reports.on_engagement)
+trending_refresh = PeriodicRefresh("Trending", trending_reports.refresh, REFRESH_TICK_SECONDS)
@@ -0,0 +1,38 @@
+import asyncio
+import time
+from app.services.report_cache import get_report_list
+from app.services.leaderboard import leaderboard
+from app.services.trending import trending_reports
+from app.services.analytics import report_analytics
+from app.utils.badges import get_badge_id
+
+# Pre-fork warmup for the multi-worker profile.
+# gunicorn.conf.py runs this as a separate process before any worker starts,
+# so the shared store already holds the expensive snapshots and every worker
+# starts hot. It never runs inside the gunicorn master, which must not hold
+# Supabase connections that forked workers would inherit.
+
+BADGE_NAMES = ["FIRST_REPORT", "HELPER", "RESOLVER"]
+
+STEPS = [
+    ("badge ids", lambda: [get_badge_id(name) for name in BADGE_NAMES]),
+    ("report list", lambda: asyncio.run(get_report_list())),
+    ("leaderboard", leaderboard.warm),
+    ("trending", trending_reports.warm),
+    ("analytics", report_analytics.warm),
+]
+
+
+def warm_shared_state():
+    for name, step in STEPS:
+        started = time.monotonic()
+        try:
+            step()
+            print(f"Warmed {name} in {time.monotonic() - started:.2f}s")
+        except Exception as e:
+            # A cold cache only costs latency; workers fill it on first use
+            print(f"Warmup error ({name}): {str(e)}")
+
+
+if __name__ == "__main__":
+    warm_shared_state()
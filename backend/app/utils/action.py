@@ -1,5 +1,10 @@
-from app.services.supabase_client import supabase
+from app.services.supabase_client import supabase, execute_read, execute_write
 from app.utils.badges import award_badges
+from app.services.leaderboard import leaderboard
+
+# Points and badge bookkeeping after a user action.
+# These make several blocking backend calls, so request handlers run them with
+# asyncio.to_thread; every call still goes through the deadline and breaker.
 
 ACTION_POINTS = {
     "CREATE_REPORT": 10,
@@ -11,34 +16,50 @@ ACTION_POINTS = {
 }
 
 def record_user_action(user_id: str, action_name: str, report_id: str | None = None):
+    record_user_actions(user_id, action_name, [report_id])
+
+def record_user_actions(user_id: str, action_name: str, report_ids: list):
+    """Record the same action on several reports with one insert per table."""
+    if not report_ids:
+        return
+
     points = ACTION_POINTS.get(action_name, 0)
-    
-    # Insert into user_actions
-    action_res = supabase.table("user_actions").insert({
-        "user_id": user_id,
-        "action_name": action_name,
-        "report_id": report_id
-    }).execute()
 
-    action_id = action_res.data[0]["id"] 
+    # Insert into user_actions
+    action_res = execute_write(supabase.table("user_actions").insert([
+        {
+            "user_id": user_id,
+            "action_name": action_name,
+            "report_id": report_id,
+            "points": points
+        }
+        for report_id in report_ids
+    ]))
 
     # Insert into user_points
-    supabase.table("user_points").insert({
-        "user_id": user_id,
-        "action_id": action_id,
-        "points": points
-    }).execute()
+    execute_write(supabase.table("user_points").insert([
+        {
+            "user_id": user_id,
+            "action_id": action["id"],
+            "points": points
+        }
+        for action in action_res.data
+    ]))
+
+    total_points = points * len(action_res.data)
 
     # Get current points
-    res = supabase.table("users").select("points").eq("user_id", user_id).execute()
+    res = execute_read(supabase.table("users").select("points").eq("user_id", user_id))
     current_points = res.data[0]["points"] if res.data else 0
 
     # Increment
-    new_points = current_points + points
+    new_points = current_points + total_points
 
     # Update
-    supabase.table("users").update({"points": new_points}).eq("user_id", user_id).execute()
+    execute_write(supabase.table("users").update({"points": new_points}).eq("user_id", user_id))
+
+    # Keep the in-memory leaderboard current
+    leaderboard.award(user_id, total_points)
 
     # Award badges
     award_badges(user_id)
-
@@ -1,41 +1,59 @@
-from app.services.supabase_client import supabase
+from app.services.supabase_client import supabase, execute_read, execute_write
+from app.services.shared_state import get_or_load
+
+# Badge ids never change once seeded, so every worker shares one lookup and
+# keeps what it found. The lookup runs on request paths: it never waits on
+# another worker's load, it just repeats the one-row query.
+BADGE_ID_TTL_SECONDS = 24 * 3600
+
+# { badge_name: badge_id }
+_badge_ids = {}
+
+def _fetch_badge_id(badge_name: str):
+    # Assuming the column is badge_id based on error report
+    result = execute_read(supabase.table("badges").select("badge_id").eq("badge_name", badge_name).single())
+    return result.data["badge_id"]
 
 def get_badge_id(badge_name: str):
+    if badge_name in _badge_ids:
+        return _badge_ids[badge_name]
     try:
-        # Assuming the column is badge_id based on error report
-        result = supabase.table("badges").select("badge_id").eq("badge_name", badge_name).single().execute()
-        return result.data["badge_id"]
+        badge_id = get_or_load(
+            f"badge_id:{badge_name}", lambda: _fetch_badge_id(badge_name), BADGE_ID_TTL_SECONDS, wait=False
+        )
+        _badge_ids[badge_name] = badge_id
+        return badge_id
     except Exception as e:
         print(f"Error fetching badge id for {badge_name}: {str(e)}")
         return None
 
+def _count_actions(user_id: str, action_name: str) -> int:
+    # Count only; the action rows themselves are never needed here
+    res = execute_read(
+        supabase.table("user_actions")
+        .select("id", count="exact", head=True)
+        .eq("user_id", user_id)
+        .eq("action_name", action_name)
+    )
+    return res.count or 0
+
+def _grant_badge(user_id: str, badge_name: str):
+    badge_id = get_badge_id(badge_name)
+    if badge_id:
+        execute_write(supabase.table("user_badges").upsert({
+            "user_id": user_id,
+            "badge_id": badge_id
+        }, on_conflict="user_id,badge_id"))
+
 def award_badges(user_id: str):
     # 1️⃣ FIRST_REPORT
-    user_reports = supabase.table("user_actions").select("*").eq("user_id", user_id).eq("action_name", "CREATE_REPORT").execute()
-    if user_reports.data and len(user_reports.data) >= 1:
-        badge_id = get_badge_id("FIRST_REPORT")
-        if badge_id:
-            supabase.table("user_badges").upsert({
-                "user_id": user_id,
-                "badge_id": badge_id
-            }, on_conflict="user_id,badge_id").execute()
+    if _count_actions(user_id, "CREATE_REPORT") >= 1:
+        _grant_badge(user_id, "FIRST_REPORT")
 
     # 2️⃣ HELPER - verify 10 community issues
-    verify_count = supabase.table("user_actions").select("*").eq("user_id", user_id).eq("action_name", "VERIFY_CLOSED").execute()
-    if verify_count.data and len(verify_count.data) >= 10:
-        badge_id = get_badge_id("HELPER")
-        if badge_id:
-            supabase.table("user_badges").upsert({
-                "user_id": user_id,
-                "badge_id": badge_id
-            }, on_conflict="user_id,badge_id").execute()
+    if _count_actions(user_id, "VERIFY_CLOSED") >= 10:
+        _grant_badge(user_id, "HELPER")
 
     # 3️⃣ RESOLVER - closed 5 reports
-    closed_count = supabase.table("user_actions").select("*").eq("user_id", user_id).eq("action_name", "MARK_CLOSED").execute()
-    if closed_count.data and len(closed_count.data) >= 5:
-        badge_id = get_badge_id("RESOLVER")
-        if badge_id:
-            supabase.table("user_badges").upsert({
-                "user_id": user_id,
-                "badge_id": badge_id
-            }, on_conflict="user_id,badge_id").execute()
+    if _count_actions(user_id, "MARK_CLOSED") >= 5:
+        _grant_badge(user_id, "RESOLVER")
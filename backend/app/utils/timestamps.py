@@ -0,0 +1,11 @@
+from datetime import datetime, timezone
+
+def parse_timestamp(value: str) -> datetime:
+    # Python 3.10 only accepts 3 or 6 fractional digits, Supabase may send fewer
+    head, _, rest = value.partition(".")
+    if rest:
+        zone_at = next((i for i, c in enumerate(rest) if not c.isdigit()), len(rest))
+        digits, zone = rest[:zone_at], rest[zone_at:]
+        value = f"{head}.{digits[:6].ljust(6, '0')}{zone}"
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
@@ -0,0 +1,60 @@
+import multiprocessing
+import os
+import subprocess
+import sys
+
+# Production profile: one uvicorn worker per core behind a gunicorn master.
+#   gunicorn app.main:app -c gunicorn.conf.py
+# Workers share caches, sessions, rate-limit buckets and live events through
+# a SQLite file in SHARED_STATE_DIR. The directory must be private to the
+# service user (0700); never point it at a shared path such as /dev/shm or /tmp.
+# Defaults to the user's runtime directory (tmpfs, so it stays in RAM), or the
+# user's cache directory where there is none.
+
+os.environ.setdefault(
+    "SHARED_STATE_DIR",
+    os.path.join(os.getenv("XDG_RUNTIME_DIR") or os.path.expanduser("~/.cache"), "fixit-my"),
+)
+
+bind = os.getenv("BIND", "0.0.0.0:" + os.getenv("PORT", "8000"))
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "uvicorn_worker.UvicornWorker"
+# Only these proxies may set the client address via X-Forwarded-For; the
+# rate limiter keys login attempts on it
+forwarded_allow_ips = os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1")
+
+# Load the app in each worker, never in the master, so no worker inherits the
+# master's Supabase connection pool
+preload_app = False
+
+# Worker heartbeat timeout; async workers keep beating while SSE streams are open
+timeout = 60
+graceful_timeout = 30
+# Above typical proxy idle timeouts so the proxy closes first
+keepalive = 75
+backlog = 2048
+
+# Recycle workers periodically; jitter keeps them from restarting together.
+# A recycled worker misses the warmup below, so the read models start from
+# the last good shared snapshot (kept for a day) and reload behind it.
+max_requests = 10000
+max_requests_jitter = 1000
+
+accesslog = "-"
+errorlog = "-"
+
+
+def on_starting(server):
+    # Warm in a child process: the master stays free of Supabase clients
+    try:
+        result = subprocess.run(
+            [sys.executable, "-m", "app.services.warmup"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            env=os.environ.copy(),
+            timeout=120,
+        )
+    except subprocess.TimeoutExpired:
+        server.log.warning("Warmup timed out; workers will start cold")
+        return
+    if result.returncode:
+        server.log.warning("Warmup exited with %s; workers will start cold", result.returncode)
@@ -43,7 +43,9 @@ CREATE TABLE reports (
     updated_at timestamptz DEFAULT now(), 
     latitude double precision,
     longitude double precision,
-    moderation_status text DEFAULT 'active'
+    moderation_status text DEFAULT 'active',
+    comments_count int NOT NULL DEFAULT 0,
+    followers_count int NOT NULL DEFAULT 0
 );
 
 CREATE TABLE comments (
@@ -62,6 +64,34 @@ CREATE TABLE report_followers (
     followed_at timestamptz DEFAULT now()
 );
 
+CREATE INDEX idx_comments_report_id ON comments(report_id, id DESC);
+
+-- Keep reports.comments_count / reports.followers_count in step with their tables
+CREATE OR REPLACE FUNCTION bump_report_counter() RETURNS trigger AS $$
+DECLARE
+    counter text := TG_ARGV[0];
+    delta int := CASE WHEN TG_OP = 'INSERT' THEN 1 ELSE -1 END;
+    target int := CASE WHEN TG_OP = 'INSERT' THEN NEW.report_id ELSE OLD.report_id END;
+BEGIN
+    EXECUTE format('UPDATE reports SET %I = GREATEST(%I + $1, 0) WHERE report_id = $2', counter, counter)
+    USING delta, target;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER comments_count_trigger
+AFTER INSERT OR DELETE ON comments
+FOR EACH ROW EXECUTE FUNCTION bump_report_counter('comments_count');
+
+CREATE TRIGGER followers_count_trigger
+AFTER INSERT OR DELETE ON report_followers
+FOR EACH ROW EXECUTE FUNCTION bump_report_counter('followers_count');
+
+-- Backfill counters for existing rows
+UPDATE reports r SET
+    comments_count = (SELECT count(*) FROM comments c WHERE c.report_id = r.report_id),
+    followers_count = (SELECT count(*) FROM report_followers f WHERE f.report_id = r.report_id);
+
 CREATE TABLE report_helpers (
     id serial PRIMARY KEY,
     report_id int REFERENCES reports(report_id) ON DELETE CASCADE,
@@ -85,6 +115,59 @@ CREATE TABLE community_confirmations (
     confirmed_at timestamptz DEFAULT now()
 );
 
+-- Every status change with its time, written by the database so no code path can skip it.
+-- The trigger also stamps reports.updated_at with the same time, which the API
+-- reads back from the update so live counters and rebuilds agree.
+CREATE TABLE report_status_history (
+    id bigserial PRIMARY KEY,
+    report_id int NOT NULL REFERENCES reports(report_id) ON DELETE CASCADE,
+    status text NOT NULL,
+    changed_at timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE INDEX idx_report_status_history_changed_at ON report_status_history(changed_at, id);
+
+CREATE OR REPLACE FUNCTION record_report_status() RETURNS trigger AS $$
+BEGIN
+    NEW.updated_at := now();
+    INSERT INTO report_status_history (report_id, status, changed_at)
+    VALUES (NEW.report_id, NEW.status, NEW.updated_at);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER report_status_history_trigger
+BEFORE UPDATE OF status ON reports
+FOR EACH ROW WHEN (OLD.status IS DISTINCT FROM NEW.status)
+EXECUTE FUNCTION record_report_status();
+
+-- Backfill: history was never stored, so rebuild what the other tables show.
+-- Acknowledged at the first comment, in progress at the first helper claim,
+-- closed at the confirmation that reached the threshold (3). Closed reports
+-- with no confirmations have no known close time and are left out.
+INSERT INTO report_status_history (report_id, status, changed_at)
+SELECT r.report_id, 'acknowledged', min(c.created_at)
+FROM reports r JOIN comments c ON c.report_id = r.report_id
+WHERE r.status IN ('acknowledged', 'in_progress', 'closed')
+GROUP BY r.report_id;
+
+INSERT INTO report_status_history (report_id, status, changed_at)
+SELECT r.report_id, 'in_progress', min(h.claimed_at)
+FROM reports r JOIN report_helpers h ON h.report_id = r.report_id
+WHERE r.status IN ('in_progress', 'closed')
+GROUP BY r.report_id;
+
+INSERT INTO report_status_history (report_id, status, changed_at)
+SELECT report_id, 'closed', confirmed_at
+FROM (
+    SELECT c.report_id, c.confirmed_at,
+           row_number() OVER (PARTITION BY c.report_id ORDER BY c.confirmed_at DESC) AS newest,
+           row_number() OVER (PARTITION BY c.report_id ORDER BY c.confirmed_at) AS position
+    FROM community_confirmations c JOIN reports r ON r.report_id = c.report_id
+    WHERE r.status = 'closed'
+) ranked
+WHERE position = 3 OR (newest = 1 AND position < 3);
+
 CREATE TYPE action_type AS ENUM (
     'CREATE_REPORT',
     'FOLLOW_REPORT',
@@ -114,6 +197,25 @@ CREATE TABLE user_points (
 );
 
 CREATE INDEX idx_user_points_user_id ON user_points(user_id);
+CREATE INDEX idx_user_actions_user_id_id ON user_actions(user_id, id DESC);
+CREATE INDEX idx_reports_created_by ON reports(created_by, report_id DESC);
+
+-- Backfill action points for rows written before record_user_action stored them
+UPDATE user_actions a SET points = p.points FROM user_points p WHERE p.action_id = a.id AND a.points = 0;
+
+CREATE TABLE notifications (
+    id bigserial PRIMARY KEY,
+    user_id uuid NOT NULL REFERENCES users(user_id) ON DELETE CASCADE,
+    report_id int REFERENCES reports(report_id) ON DELETE CASCADE,
+    event text NOT NULL,
+    payload jsonb DEFAULT '{}'::jsonb,
+    is_read boolean NOT NULL DEFAULT false,
+    created_at timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE INDEX idx_notifications_user_id ON notifications(user_id, id DESC);
+CREATE INDEX idx_notifications_unread ON notifications(user_id) WHERE is_read = false;
+CREATE INDEX idx_report_followers_report_id ON report_followers(report_id, id);
 
 CREATE TABLE admins (
     id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
@@ -170,6 +272,14 @@ ALTER TABLE user_badges ENABLE ROW LEVEL SECURITY;
 CREATE POLICY "User badges are viewable by everyone" ON user_badges FOR SELECT USING (true);
 CREATE POLICY "System can award badges" ON user_badges FOR INSERT WITH CHECK (auth.uid() = user_id);
 
+-- Notifications
+ALTER TABLE notifications ENABLE ROW LEVEL SECURITY;
+CREATE POLICY "Users can view their own notifications" ON notifications FOR SELECT USING (auth.uid() = user_id);
+
+-- Report Status History
+ALTER TABLE report_status_history ENABLE ROW LEVEL SECURITY;
+CREATE POLICY "Status history is viewable by everyone" ON report_status_history FOR SELECT USING (true);
+
 -- Report Helpers
 ALTER TABLE report_helpers ENABLE ROW LEVEL SECURITY;
 CREATE POLICY "Helpers are viewable by everyone" ON report_helpers FOR SELECT USING (true);
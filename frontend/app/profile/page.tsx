@@ -48,6 +48,20 @@ interface UserBadge {
     badge: BadgeInfo;
 }
 
+interface ProfileStats {
+    reports_created: number;
+    reports_verified: number;
+}
+
+interface ProfileSummary {
+    user: UserData;
+    total_points: number;
+    stats: ProfileStats;
+    actions: UserAction[];
+    my_reports: MyReport[];
+    badges: UserBadge[];
+}
+
 function timeAgo(dateString: string) {
     const date = new Date(dateString);
     const now = new Date();
@@ -106,6 +120,7 @@ export default function ProfilePage() {
     const [earnedBadges, setEarnedBadges] = useState<UserBadge[]>([]);
     const [allBadges, setAllBadges] = useState<BadgeInfo[]>([]);
     const [totalPoints, setTotalPoints] = useState(0);
+    const [stats, setStats] = useState<ProfileStats>({ reports_created: 0, reports_verified: 0 });
     const [loading, setLoading] = useState(true);
     const [activeTab, setActiveTab] = useState("profile");
     const [showLogoutModal, setShowLogoutModal] = useState(false);
@@ -119,26 +134,21 @@ export default function ProfilePage() {
 
         const fetchProfileData = async () => {
             try {
-                const [userRes, actionsRes, reportsRes, badgesRes, allBadgesRes] = await Promise.all([
-                    api.get<UserData>("/user/me"),
-                    api.get<{ actions: UserAction[] }>("/user/actions"),
-                    api.get<MyReport[]>("/user/my-reports"),
-                    api.get<{ badges: UserBadge[] }>("/user/badges"),
+                const [summaryRes, allBadgesRes] = await Promise.all([
+                    api.get<ProfileSummary>("/user/summary", {
+                        params: { actions_limit: 50, reports_limit: 50 },
+                    }),
                     api.get<{ badges: BadgeInfo[] }>("/user/all-badges"),
                 ]);
 
-                setUser(userRes.data);
-                setActions(actionsRes.data.actions);
-                setMyReports(reportsRes.data);
-                setEarnedBadges(badgesRes.data.badges);
+                const summary = summaryRes.data;
+                setUser(summary.user);
+                setActions(summary.actions);
+                setMyReports(summary.my_reports);
+                setEarnedBadges(summary.badges);
                 setAllBadges(allBadgesRes.data.badges);
-
-                // Calculate total points
-                const points = actionsRes.data.actions.reduce(
-                    (sum, action) => sum + action.points,
-                    0
-                );
-                setTotalPoints(points);
+                setTotalPoints(summary.total_points);
+                setStats(summary.stats);
             } catch (error) {
                 console.error("Error fetching profile data:", error);
             } finally {
@@ -160,9 +170,8 @@ export default function ProfilePage() {
         }
     };
 
-    // Calculate stats from actions
-    const reportsCreated = actions.filter(a => a.action_name === "CREATE_REPORT").length;
-    const resolutionsConfirmed = actions.filter(a => a.action_name === "CONFIRM_RESOLUTION").length;
+    const reportsCreated = stats.reports_created;
+    const resolutionsConfirmed = stats.reports_verified;
 
     // Determine level based on points
     const getLevelInfo = (pts: number) => {
@@ -80,6 +80,8 @@ export default function ReportDetailPage() {
     const [followers, setFollowers] = useState<ReportFollower[]>([]);
     const [followersCount, setFollowersCount] = useState(0);
     const [comments, setComments] = useState<Comment[]>([]);
+    const [commentsCursor, setCommentsCursor] = useState<number | null>(null);
+    const [loadingMoreComments, setLoadingMoreComments] = useState(false);
     const [newComment, setNewComment] = useState("");
     const [postingComment, setPostingComment] = useState(false);
     const [loading, setLoading] = useState(true);
@@ -118,18 +120,19 @@ export default function ReportDetailPage() {
                         avatar: apiReport.users.avatar
                     },
                     is_following: is_following,
-                    followers_count: followers.length,
+                    followers_count: apiReport.followers_count ?? followers.length,
                     is_anonymous: apiReport.is_anonymous,
                 };
 
                 setReport(mappedReport);
                 setFollowers(followers);
-                setFollowersCount(followers.length);
+                setFollowersCount(apiReport.followers_count ?? followers.length);
                 setIsFollowing(is_following);
 
                 // Fetch comments
                 const commentsResponse = await api.get<CommentResponse>(`/report/comments/${id}`);
                 setComments(commentsResponse.data.comments);
+                setCommentsCursor(commentsResponse.data.next_cursor ?? null);
 
             } catch (error) {
                 console.error("Error fetching report:", error);
@@ -264,6 +267,23 @@ export default function ReportDetailPage() {
         }
     }
 
+    async function handleLoadMoreComments() {
+        if (commentsCursor === null) return;
+
+        setLoadingMoreComments(true);
+        try {
+            const commentsResponse = await api.get<CommentResponse>(`/report/comments/${id}`, {
+                params: { before: commentsCursor },
+            });
+            setComments(prev => [...prev, ...commentsResponse.data.comments]);
+            setCommentsCursor(commentsResponse.data.next_cursor ?? null);
+        } catch (error) {
+            console.error("Error loading more comments:", error);
+        } finally {
+            setLoadingMoreComments(false);
+        }
+    }
+
     async function handlePostComment() {
         if (!isAuthenticated) {
             setShowSignInModal(true);
@@ -278,6 +298,7 @@ export default function ReportDetailPage() {
             // Re-fetch comments to get the real data
             const commentsResponse = await api.get<CommentResponse>(`/report/comments/${id}`);
             setComments(commentsResponse.data.comments);
+            setCommentsCursor(commentsResponse.data.next_cursor ?? null);
 
             // Re-fetch report to get updated status
             const reportResponse = await api.get<ReportDetailResponse>(`/report/${id}`);
@@ -335,9 +356,9 @@ export default function ReportDetailPage() {
                             />
                         </div>
                     ))}
-                    {followers.length > 5 && (
+                    {followersCount > 5 && (
                         <div className="flex items-center justify-center h-10 w-10 rounded-full ring-4 ring-white bg-brand-bg-light text-brand-primary text-xs font-bold">
-                            +{followers.length - 5}
+                            +{followersCount - 5}
                         </div>
                     )}
                 </div>
@@ -652,6 +673,15 @@ export default function ReportDetailPage() {
                                         </div>
                                     ))
                                 )}
+                                {commentsCursor !== null && (
+                                    <button
+                                        onClick={handleLoadMoreComments}
+                                        disabled={loadingMoreComments}
+                                        className="w-full text-xs font-bold text-brand-primary hover:underline disabled:opacity-50"
+                                    >
+                                        {loadingMoreComments ? "Loading..." : "Load older comments"}
+                                    </button>
+                                )}
                             </div>
 
                             <div className="mt-6 pt-4 border-t border-gray-50">
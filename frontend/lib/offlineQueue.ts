@@ -138,6 +138,8 @@ export async function syncPendingReports(token: string): Promise<SyncResult> {
         headers: {
           'Content-Type': 'multipart/form-data',
           'Authorization': `Bearer ${token}`,
+          // Stable per queued report, so a retry after a lost response is not a duplicate
+          'Idempotency-Key': report.id,
         },
       });
 
@@ -1,4 +1,5 @@
 export interface Comment {
+    id?: number;
     comment: string;
     created_at: string;
     users: {
@@ -9,4 +10,5 @@ export interface Comment {
 
 export interface CommentResponse {
     comments: Comment[];
+    next_cursor?: number | null;
 }
@@ -38,6 +38,8 @@ export interface ReportDetail {
     photo_url: string;
     created_at: string;
     is_anonymous?: boolean;
+    followers_count?: number;
+    comments_count?: number;
     users: {
         name: string;
         avatar: string;